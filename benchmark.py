@@ -0,0 +1,303 @@
+"""Reproducible throughput report for comparing releases.
+
+Runs fixed workloads headless: multi-scale image detection (image_processor.detect_multi_scale on an
+image resized by the image policy), the video path (process_video_frame over a generated clip unless
+--video is given) and export (a seeded synthetic session written as JSON and as a .lmks stream). The
+report records the environment (CPU count, OpenCV threads, MediaPipe and application versions, git
+revision) and per-workload timings as JSON. With --compare it is diffed against an earlier report, and
+--max-regression turns a throughput drop beyond that percentage into a non-zero exit.
+
+    python benchmark.py --output before.json
+    python benchmark.py --compare before.json --max-regression 10
+"""
+import numpy as np
+import subprocess
+import statistics
+import argparse
+import datetime
+import platform
+import tempfile
+import logging
+import shutil
+import time
+import json
+import sys
+import cv2
+import os
+
+from media_processor import process_video_frame
+from export_jobs import ExportJob, build_metadata
+from image_processor import detect_multi_scale
+from resolution_policy import IMAGE_POLICY
+from landmark_cache import video_fingerprint
+from frame_sources import parse_size
+from logger_setup import setup_logger
+from profiles import PROFILES, DEFAULT_PROFILE
+from soak_test import generate_video
+from headless import HeadlessApp
+
+logger = setup_logger(__name__)
+
+REPORT_VERSION = 1
+SEED = 0
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def environment(app):
+    """Return the hardware and library details that a throughput number depends on."""
+    metadata = build_metadata(app, datetime.datetime.now())
+    return {
+        "application_version": metadata["application_version"],
+        "mediapipe_version": metadata["mediapipe_version"],
+        "git_revision": _git_revision(),
+        "opencv_version": cv2.__version__,
+        "opencv_threads": cv2.getNumThreads(),
+        "numpy_version": np.__version__,
+        "python_version": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "usable_cpus": len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count(),
+    }
+
+def synthetic_image(width, height, seed=SEED):
+    """Return a seeded BGR image of noise and face-like shapes."""
+    rng = np.random.default_rng(seed)
+    image = rng.integers(0, 40, (height, width, 3), dtype=np.uint8)
+    for _ in range(3):
+        axes = int(rng.integers(height // 12, height // 6))
+        cx = int(rng.integers(axes, width - axes))
+        cy = int(rng.integers(axes, height - axes))
+        cv2.ellipse(image, (cx, cy), (int(axes * 0.8), axes), 0, 0, 360, (140, 170, 210), -1)
+        cv2.circle(image, (cx - axes // 3, cy - axes // 4), max(2, axes // 10), (40, 40, 40), -1)
+        cv2.circle(image, (cx + axes // 3, cy - axes // 4), max(2, axes // 10), (40, 40, 40), -1)
+    return image
+
+def synthetic_records(frames, landmarks=478, width=1280, height=720, seed=SEED):
+    """Return a seeded export session of one slowly moving face per frame."""
+    rng = np.random.default_rng(seed)
+    points = rng.uniform((0, 0, -0.1), (width, height, 0.1), (landmarks, 3))
+    records = []
+    for frame in range(frames):
+        points = points + rng.normal(0, (1.5, 1.5, 0.002), points.shape)
+        records.append({"frame": frame, "face_index": 0, "landmarks": [{
+            "id": idx,
+            "position": {"x": round(float(x), 2), "y": round(float(y), 2), "z": round(float(z), 3)}
+        } for idx, (x, y, z) in enumerate(points)]})
+    return records
+
+def summarize(durations, units=1):
+    """Return throughput and latency statistics for per-iteration durations in seconds."""
+    total = sum(durations)
+    ordered = sorted(durations)
+    return {
+        "iterations": len(durations),
+        "seconds": round(total, 4),
+        "per_second": round(units * len(durations) / total, 2) if total else None,
+        "ms_mean": round(1000 * total / len(durations), 3),
+        "ms_p50": round(1000 * statistics.median(ordered), 3),
+        "ms_p95": round(1000 * ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))], 3),
+    }
+
+def bench_image(app, image, iterations, warmup):
+    """Time policy resize plus multi-scale detection with the profile's scales."""
+    policy = getattr(app, 'image_resolution_policy', IMAGE_POLICY)
+    durations = []
+    faces = 0
+    for i in range(warmup + iterations):
+        start = time.perf_counter()
+        decision = policy.choose(image.shape[1], image.shape[0])
+        image_rgb = cv2.cvtColor(policy.resize(image, decision), cv2.COLOR_BGR2RGB)
+        _, faces, _ = detect_multi_scale(app.face_mesh_image, image_rgb, app.profile.scales)
+        if i >= warmup:
+            durations.append(time.perf_counter() - start)
+    result = summarize(durations)
+    result["faces"] = faces
+    result["scales"] = list(app.profile.scales)
+    return result
+
+def bench_video(app, video_path, frames, warmup):
+    """Time process_video_frame over the first warmup + frames frames of video_path; decoding is excluded."""
+    app.vid = cv2.VideoCapture(video_path)
+    if not app.vid.isOpened():
+        raise IOError(f"Failed to open video file {video_path}")
+    durations = []
+    records = 0
+    for i in range(warmup + frames):
+        ret, frame = app.vid.read()
+        if not ret:
+            break
+        start = time.perf_counter()
+        _, landmarks = process_video_frame(app, frame)
+        elapsed = time.perf_counter() - start
+        app.frame_count += 1
+        if i >= warmup:
+            durations.append(elapsed)
+            records += len(landmarks)
+    app.vid.release()
+    app.vid = None
+    if not durations:
+        raise IOError(f"{video_path} has no frames after the {warmup} warm-up frames")
+    result = summarize(durations)
+    result["face_records"] = records
+    result["static_frames_skipped"] = app.static_detector.skipped
+    return result
+
+def bench_export(app, records, work_dir, repeat, stream):
+    """Time writing records as one export, repeat times."""
+    metadata = build_metadata(app, datetime.datetime(2000, 1, 1))
+    durations = []
+    size = 0
+    for i in range(repeat):
+        job = ExportJob(os.path.join(work_dir, f"export_{i}.json"), metadata, records, stream=stream)
+        start = time.perf_counter()
+        job.run()
+        durations.append(time.perf_counter() - start)
+        if job.status != "done":
+            raise IOError(f"Export failed: {job.error}")
+        size = os.path.getsize(job.filepath)
+        os.remove(job.filepath)
+    result = summarize(durations, units=len(records))
+    result["records"] = len(records)
+    result["bytes"] = size
+    result["mb_per_second"] = round(len(durations) * size / sum(durations) / (1024 * 1024), 2)
+    return result
+
+def compare(report, previous, threshold):
+    """Return per-workload throughput changes against a previous report, in percent."""
+    rows = []
+    for name, current in report["workloads"].items():
+        before = previous.get("workloads", {}).get(name)
+        if not before or not before.get("per_second") or not current.get("per_second"):
+            continue
+        change = 100 * (current["per_second"] - before["per_second"]) / before["per_second"]
+        rows.append({
+            "workload": name,
+            "before": before["per_second"],
+            "after": current["per_second"],
+            "change_pct": round(change, 2),
+            "p95_before_ms": before.get("ms_p95"),
+            "p95_after_ms": current.get("ms_p95"),
+            "status": "regression" if change < -threshold else "improvement" if change > threshold else "unchanged",
+        })
+    return {
+        "previous_created": previous.get("created"),
+        "threshold_pct": threshold,
+        "environment_changes": {key: [previous.get("environment", {}).get(key), value]
+                                for key, value in report["environment"].items()
+                                if key != "git_revision" and previous.get("environment", {}).get(key) != value},
+        "config_changes": {key: [previous.get("config", {}).get(key), value]
+                           for key, value in report["config"].items() if previous.get("config", {}).get(key) != value},
+        "workloads": rows,
+    }
+
+def print_comparison(comparison):
+    print(f"Compared with report from {comparison['previous_created']} (threshold {comparison['threshold_pct']}%)")
+    for key, (before, after) in comparison["environment_changes"].items():
+        print(f"  environment {key}: {before} -> {after}")
+    for key, (before, after) in comparison["config_changes"].items():
+        print(f"  config {key}: {before} -> {after} (workloads differ; numbers are not comparable)")
+    print(f"  {'workload':<14}{'before/s':>12}{'after/s':>12}{'change':>10}{'p95 ms':>20}")
+    for row in comparison["workloads"]:
+        p95 = f"{row['p95_before_ms']} -> {row['p95_after_ms']}"
+        print(f"  {row['workload']:<14}{row['before']:>12}{row['after']:>12}{row['change_pct']:>+9.1f}%{p95:>20}  {row['status']}")
+
+def run(args):
+    if args.cv_threads is not None:
+        cv2.setNumThreads(args.cv_threads)
+    work_dir = tempfile.mkdtemp(prefix="benchmark_")
+    app = HeadlessApp(landmarks_dir=os.path.join(work_dir, "landmarks"), profile=args.profile)
+    root = logging.getLogger()
+    level = root.level
+    try:
+        if args.image:
+            image = cv2.imread(args.image)
+            if image is None:
+                logger.error(f"Failed to read image {args.image}")
+                return 2
+        else:
+            image = synthetic_image(*args.image_size)
+        video_path = args.video or generate_video(os.path.join(work_dir, "synthetic.mp4"), args.frames + args.warmup)
+
+        report = {
+            "report_version": REPORT_VERSION,
+            "created": datetime.datetime.now().isoformat(),
+            "environment": environment(app),
+            "config": {
+                "profile": args.profile,
+                "image": video_fingerprint(args.image) if args.image else f"synthetic {image.shape[1]}x{image.shape[0]}",
+                "image_iterations": args.images,
+                "video": video_fingerprint(args.video) if args.video else "synthetic 640x480",
+                "video_frames": args.frames,
+                "export_records": args.export_records,
+                "export_repeat": args.export_repeat,
+                "warmup": args.warmup,
+                "seed": SEED,
+            },
+            "workloads": {},
+        }
+
+        if not args.verbose:
+            root.setLevel(logging.WARNING)
+        workloads = report["workloads"]
+        workloads["image"] = bench_image(app, image, args.images, min(args.warmup, 3))
+        workloads["video"] = bench_video(app, video_path, args.frames, args.warmup)
+        records = synthetic_records(args.export_records)
+        workloads["export_json"] = bench_export(app, records, work_dir, args.export_repeat, stream=False)
+        workloads["export_stream"] = bench_export(app, records, work_dir, args.export_repeat, stream=True)
+        root.setLevel(level)
+
+        for name, result in workloads.items():
+            logger.info(f"{name}: {result['per_second']}/s, mean {result['ms_mean']} ms, p95 {result['ms_p95']} ms")
+
+        status = 0
+        if args.compare:
+            with open(args.compare) as f:
+                previous = json.load(f)
+            report["comparison"] = compare(report, previous, args.threshold)
+            print_comparison(report["comparison"])
+            if args.max_regression is not None and any(row["change_pct"] < -args.max_regression
+                                                       for row in report["comparison"]["workloads"]):
+                logger.error(f"Throughput dropped by more than {args.max_regression}%")
+                status = 1
+
+        output = args.output or os.path.join("logs", f"benchmark_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+        os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=2)
+        logger.info(f"Benchmark report written to {output}")
+        return status
+    finally:
+        root.setLevel(level)
+        app.close()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure image, video and export throughput and compare with an earlier report.")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default=DEFAULT_PROFILE, help="performance profile")
+    parser.add_argument("--image", help="image to detect on instead of a generated one")
+    parser.add_argument("--image-size", type=parse_size, default=(1920, 1080), help="size of the generated image, e.g. 1920x1080")
+    parser.add_argument("--images", type=int, default=20, help="timed multi-scale detections of the image")
+    parser.add_argument("--video", help="video file to process instead of a generated clip")
+    parser.add_argument("--frames", type=int, default=300, help="timed video frames")
+    parser.add_argument("--warmup", type=int, default=10, help="untimed video frames (and up to 3 images) processed first")
+    parser.add_argument("--export-records", type=int, default=1000, help="face records in the export workload")
+    parser.add_argument("--export-repeat", type=int, default=3, help="times each export is written")
+    parser.add_argument("--cv-threads", type=int, default=None, help="pin the OpenCV thread count")
+    parser.add_argument("--output", help="report path (default logs/benchmark_<time>.json)")
+    parser.add_argument("--compare", help="earlier report to diff against")
+    parser.add_argument("--threshold", type=float, default=5.0, help="change in percent reported as a regression or improvement")
+    parser.add_argument("--max-regression", type=float, default=None, help="exit with status 1 if any workload slows by more than this percent")
+    parser.add_argument("--verbose", action="store_true", help="keep INFO logging from the workloads")
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.INFO)
+    sys.exit(run(args))
+
+if __name__ == "__main__":
+    main()
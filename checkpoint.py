@@ -0,0 +1,128 @@
+"""Checkpoints for long offline runs.
+
+Every few hundred frames the records produced since the last checkpoint are appended to
+landmarks/.checkpoints/<key>.partial.jsonl and the run state is written atomically to <key>.json.
+The key combines the input fingerprint with the detector config, the detection mode (tracking or
+static-mode inference workers), regions and static-frame threshold, so a checkpoint is only resumed
+by a run that would produce the same records. A resumed run reloads the saved records, cuts
+off anything written after the last checkpoint, seeks the source to the next frame and re-detects from
+there, so tracking starts again from a fresh detection.
+"""
+import hashlib
+import json
+import os
+
+from landmark_cache import video_fingerprint, detector_fingerprint
+from logger_setup import setup_logger
+
+logger = setup_logger(__name__)
+
+CHECKPOINT_DIRNAME = ".checkpoints"
+CHECKPOINT_EVERY = 500
+
+def source_fingerprint(spec):
+    """Return a fingerprint of a video file, image directory or "-" for stdin."""
+    if os.path.isfile(spec):
+        return video_fingerprint(spec)
+    digest = hashlib.sha1(os.path.abspath(spec).encode() if spec != "-" else b"stdin")
+    if os.path.isdir(spec):
+        for name in sorted(os.listdir(spec)):
+            digest.update(f"{name}:{os.path.getsize(os.path.join(spec, name))}".encode())
+    return digest.hexdigest()[:16]
+
+def seek_source(source, index):
+    """Move source to frame index, by seeking when possible and by skipping frames otherwise."""
+    if source.seek(index) and source.position == index:
+        return True
+    while source.position < index:
+        if not source.grab():
+            return False
+    return source.position == index
+
+class Checkpoint:
+    """Saves the records of an offline run at regular frame intervals so the run can be resumed."""
+    def __init__(self, path, every=CHECKPOINT_EVERY):
+        self.path = path
+        self.partial_path = path[:-len(".json")] + ".partial.jsonl"
+        self.every = every
+        self.pending = []
+        self.next_frame = 0
+        self.partial_bytes = 0
+
+    @classmethod
+    def for_run(cls, app, input_path, every=CHECKPOINT_EVERY, inference_workers=None):
+        checkpoint_dir = os.path.join(app.landmarks_dir, CHECKPOINT_DIRNAME)
+        os.makedirs(checkpoint_dir, exist_ok=True)
+        mode = "static" if inference_workers else "tracking"
+        settings = f"{','.join(app.regions or ())};{app.static_detector.effective_threshold};{mode}"
+        settings = hashlib.sha1(settings.encode()).hexdigest()[:6]
+        name = f"{source_fingerprint(input_path)}-{detector_fingerprint(app.profile)}-{settings}.json"
+        return cls(os.path.join(checkpoint_dir, name), every)
+
+    def load(self):
+        """Return the saved run state, or None if there is no checkpoint."""
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path) as f:
+            return json.load(f)
+
+    def resume(self, app):
+        """Restore the saved records into app.all_landmarks and return the frame to continue from."""
+        state = self.load()
+        if state is None:
+            return 0
+        if not os.path.exists(self.partial_path) or os.path.getsize(self.partial_path) < state["partial_bytes"]:
+            logger.warning(f"Checkpoint records in {self.partial_path} are missing or incomplete; starting over")
+            self.discard()
+            return 0
+        with open(self.partial_path, 'r+b') as f:
+            f.truncate(state["partial_bytes"])
+        with open(self.partial_path) as f:
+            for line in f:
+                app.all_landmarks.append(json.loads(line))
+        self.next_frame = state["next_frame"]
+        self.partial_bytes = state["partial_bytes"]
+        app.static_detector.checked = state.get("static_frames_checked", 0)
+        app.static_detector.skipped = state.get("static_frames_skipped", 0)
+        logger.info(f"Resuming from checkpoint at frame {self.next_frame} with {state['records']} records")
+        return self.next_frame
+
+    def start(self):
+        """Begin a fresh run, discarding any earlier checkpoint."""
+        self.discard()
+        open(self.partial_path, 'wb').close()
+
+    def add(self, frame_index, records, app):
+        """Record that frame_index is complete with records; saves once every frames have accumulated."""
+        self.pending.extend(records)
+        if frame_index + 1 - self.next_frame >= self.every:
+            self.save(frame_index + 1, app)
+
+    def save(self, next_frame, app):
+        """Append the pending records and atomically write the state for continuing at next_frame."""
+        with open(self.partial_path, 'ab') as f:
+            for record in self.pending:
+                f.write(json.dumps(record).encode() + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+            self.partial_bytes = f.tell()
+        self.pending = []
+        self.next_frame = next_frame
+        state = {
+            "next_frame": next_frame,
+            "partial_bytes": self.partial_bytes,
+            "records": len(app.all_landmarks),
+            "static_frames_checked": app.static_detector.checked,
+            "static_frames_skipped": app.static_detector.skipped,
+        }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+        logger.info(f"Checkpoint saved at frame {next_frame}")
+
+    def discard(self):
+        """Remove the checkpoint once its run has been exported."""
+        for path in (self.path, self.partial_path):
+            if os.path.exists(path):
+                os.remove(path)
@@ -0,0 +1,124 @@
+import mediapipe as mp
+import threading
+import logging
+import gzip
+import os
+
+from concurrent.futures import ThreadPoolExecutor
+from landmark_buffer import LandmarkBuffer, dump_landmarks_json
+from landmark_index import IndexBuilder, index_path_for
+from landmark_stream import write_landmark_stream
+
+export_executor = ThreadPoolExecutor(max_workers=1)
+
+class ExportCancelled(Exception):
+    """Raised inside an export job when it has been cancelled."""
+
+class ExportJob:
+    """A landmark export running on the background export executor.
+
+    The output is written to a temporary file next to filepath and renamed into place only when the
+    write completes, so a cancelled or failed export never leaves a partial file behind. The job owns
+    frames: a LandmarkBuffer handed to it is cleaned up once the export succeeds, and kept with its
+    spill chunks when the export is cancelled or fails so the session can be restored. With stream set the
+    records are written as a delta-encoded .lmks landmark stream instead of JSON.
+    """
+    def __init__(self, filepath, metadata, frames, compress=False, build_index=False, stream=False):
+        if stream and filepath.endswith(".json"):
+            filepath = filepath[:-len(".json")] + ".lmks"
+        if compress and not filepath.endswith(".gz"):
+            filepath += ".gz"
+        self.filepath = filepath
+        self.metadata = metadata
+        self.frames = frames
+        self.compress = compress
+        self.stream = stream
+        self.total = len(frames)
+        self.written = 0
+        self.status = "pending"
+        self.error = None
+        self.index = IndexBuilder() if build_index else None
+        self.cancel_event = threading.Event()
+        self.future = None
+
+    @property
+    def done(self):
+        return self.status in ("done", "cancelled", "failed")
+
+    @property
+    def progress(self):
+        """Fraction of frames written, between 0 and 1."""
+        return self.written / self.total if self.total else 1.0
+
+    def cancel(self):
+        """Request cancellation; the job stops before writing its next frame."""
+        self.cancel_event.set()
+
+    def _frames(self):
+        for frame in self.frames:
+            if self.cancel_event.is_set():
+                raise ExportCancelled()
+            if self.index is not None:
+                self.index.add(frame)
+            yield frame
+            self.written += 1
+
+    def run(self):
+        """Write the export file. Called on the export executor."""
+        self.status = "running"
+        tmp_path = self.filepath + ".tmp"
+        try:
+            if self.compress:
+                f = gzip.open(tmp_path, 'wb' if self.stream else 'wt', compresslevel=6)
+            else:
+                f = open(tmp_path, 'wb' if self.stream else 'w')
+            with f:
+                if self.stream:
+                    write_landmark_stream(self.metadata, self._frames(), f)
+                else:
+                    dump_landmarks_json(self.metadata, self._frames(), f)
+            os.replace(tmp_path, self.filepath)
+            if self.index is not None:
+                self.index.write(index_path_for(self.filepath), self.metadata)
+            self.status = "done"
+            logging.info(f"Landmarks exported to {self.filepath}")
+        except ExportCancelled:
+            self.status = "cancelled"
+            logging.info(f"Export to {self.filepath} cancelled after {self.written} of {self.total} frames")
+        except Exception as e:
+            self.status = "failed"
+            self.error = e
+            logging.error(f"Error exporting landmarks: {e}")
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            if isinstance(self.frames, LandmarkBuffer):
+                if self.status == "done":
+                    self.frames.cleanup()
+                elif self.frames.spill_dir is not None:
+                    logging.warning(f"Keeping {len(self.frames)} unexported records, "
+                                    f"{len(self.frames.chunks)} spill chunks in {self.frames.spill_dir}")
+
+def build_metadata(app, now):
+    """Return the export metadata block for the app's current capture."""
+    return {
+        "timestamp": now.isoformat(),
+        "total_frames": app.frame_count,
+        "capture_mode": "real-time" if app.realtime_capture else "single-frame",
+        "mediapipe_version": mp.__version__,
+        "application_version": "1.0.0",
+        "profile": app.profile.name,
+        "regions": app.regions or "all",
+        "frame_size": list(app.frame_size) if getattr(app, 'frame_size', None) else None,
+        "face_mesh_config": app.profile.face_mesh_config(
+            static_image_mode=app.source_mode == "image" or bool(getattr(app, 'inference_workers', None))),
+        "face_budget_switches": app.face_budget.switches,
+        "static_threshold": app.static_detector.effective_threshold,
+        "static_frames_skipped": app.static_detector.skipped
+    }
+
+def submit_export(filepath, metadata, frames, compress=False, build_index=False, stream=False):
+    """Queue an export on the background executor and return its ExportJob."""
+    job = ExportJob(filepath, metadata, frames, compress, build_index, stream)
+    job.future = export_executor.submit(job.run)
+    return job
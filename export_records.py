@@ -0,0 +1,34 @@
+from regions import region_indices
+
+def landmark_records(landmarks, width, height, regions):
+    """Convert the selected landmarks of one face to export records in pixel coordinates.
+
+    landmarks is a FaceMesh NormalizedLandmarkList or an (N, 3) array of normalized x, y, z.
+    """
+    proto = hasattr(landmarks, 'landmark')
+    points = landmarks.landmark if proto else landmarks
+    records = []
+    for idx in region_indices(regions, len(points)):
+        if proto:
+            x, y, z = points[idx].x, points[idx].y, points[idx].z
+        else:
+            x, y, z = (float(v) for v in points[idx])
+        records.append({
+            "id": idx,
+            "position": {
+                "x": round(x * width, 2),
+                "y": round(y * height, 2),
+                "z": round(z, 3)
+            }
+        })
+    return records
+
+def face_records(faces, width, height, regions, frame=None):
+    """Return the export records of every face, tagged with frame when one is given."""
+    records = []
+    for face_idx, landmarks in enumerate(faces):
+        record = {} if frame is None else {"frame": frame}
+        record["face_index"] = face_idx
+        record["landmarks"] = landmark_records(landmarks, width, height, regions)
+        records.append(record)
+    return records
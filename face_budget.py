@@ -0,0 +1,69 @@
+import logging
+
+from collections import deque
+
+class FaceBudget:
+    """Adapts max_num_faces of the video FaceMesh to the number of faces seen over recent frames.
+
+    Once every frame in the window has found fewer faces than the profile allows, tracking switches to
+    a model limited to the largest count observed. The full budget is restored every redetect_interval
+    frames so that faces entering the scene are picked up again.
+    """
+    def __init__(self, profile, window=30, redetect_interval=150):
+        self.profile = profile
+        self.max_faces = profile.max_num_faces
+        self.budget = self.max_faces
+        self.history = deque(maxlen=window)
+        self.redetect_interval = redetect_interval
+        self.frames_since_switch = 0
+        self.switches = 0
+        self.models = {}
+
+    def model(self, full_model):
+        """Return the FaceMesh to use for the current budget; full_model is the profile's video model."""
+        if self.budget == self.max_faces:
+            return full_model
+        if self.budget not in self.models:
+            self.models[self.budget] = self.profile.create_face_mesh(static_image_mode=False, max_num_faces=self.budget)
+        return self.models[self.budget]
+
+    def observe(self, face_count):
+        """Record the faces found in a frame and return the budget for the next frame."""
+        self.history.append(face_count)
+        self.frames_since_switch += 1
+        if self.budget < self.max_faces:
+            if self.frames_since_switch >= self.redetect_interval:
+                self._switch(self.max_faces, "periodic re-detection")
+        elif len(self.history) == self.history.maxlen:
+            observed = max(1, max(self.history))
+            if observed < self.max_faces:
+                self._switch(observed, f"at most {max(self.history)} face(s) in {len(self.history)} frames")
+        return self.budget
+
+    def _switch(self, budget, reason):
+        logging.info(f"Face budget {self.budget} -> {budget} ({reason})")
+        self.budget = budget
+        self.switches += 1
+        self.frames_since_switch = 0
+        self.history.clear()
+
+    def summary(self):
+        """Return a one-line description of the current budget and switch count."""
+        return f"face budget {self.budget}/{self.max_faces}, {self.switches} switches"
+
+    def reset(self, profile=None):
+        """Start over with the full budget, e.g. for a new clip or profile; tightened models are released."""
+        self.close()
+        if profile is not None:
+            self.profile = profile
+        self.max_faces = self.profile.max_num_faces
+        self.budget = self.max_faces
+        self.history.clear()
+        self.frames_since_switch = 0
+        self.switches = 0
+
+    def close(self):
+        """Release the tightened models."""
+        for face_mesh in self.models.values():
+            face_mesh.close()
+        self.models = {}
@@ -0,0 +1,60 @@
+import numpy as np
+import cv2
+
+# Mean absolute thumbnail difference, 0-255 scale. Sensor noise on a still scene stays around 0.2, while
+# slow head movement already starts near 0.75 and costs around a pixel of landmark error when skipped.
+DEFAULT_STATIC_THRESHOLD = 0.5
+
+class StaticFrameDetector:
+    """Detects frames that are unchanged since the last inferred frame so their landmarks can be reused.
+
+    Frames are reduced to a small grayscale thumbnail and compared with the thumbnail of the last frame
+    that went through inference by mean absolute difference. Comparing against that reference rather
+    than the previous frame keeps slow drift from going unnoticed across a long static run. A threshold
+    of 0 disables skipping.
+    """
+    def __init__(self, threshold=DEFAULT_STATIC_THRESHOLD, size=(64, 36), enabled=True):
+        self.threshold = threshold
+        self.size = size
+        self.enabled = enabled and threshold > 0
+        self.checked = 0
+        self.skipped = 0
+        self.reset()
+
+    def reset(self):
+        """Forget the reference frame, e.g. when the video or detector settings change."""
+        self.reference = None
+        self.payload = None
+
+    def signature(self, frame):
+        """Return the downsampled grayscale thumbnail used for comparison."""
+        gray = cv2.cvtColor(cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+        return gray.astype(np.int16)
+
+    def lookup(self, signature):
+        """Return the stored payload if signature matches the reference within the threshold, else None."""
+        if not self.enabled:
+            return None
+        self.checked += 1
+        if self.reference is None or np.abs(signature - self.reference).mean() > self.threshold:
+            return None
+        self.skipped += 1
+        return self.payload
+
+    def store(self, signature, payload):
+        """Make signature the reference for later frames, with the results inferred for it."""
+        self.reference = signature
+        self.payload = payload
+
+    @property
+    def effective_threshold(self):
+        """The threshold in use, 0 when skipping is disabled."""
+        return self.threshold if self.enabled else 0
+
+    @property
+    def skip_ratio(self):
+        return self.skipped / self.checked if self.checked else 0.0
+
+    def summary(self):
+        """Return a one-line description of how many frames were skipped."""
+        return f"{self.skipped} static frames skipped ({self.skip_ratio:.0%})"
@@ -0,0 +1,272 @@
+"""Frame sources consumed by the video pipeline.
+
+Every source mirrors the subset of cv2.VideoCapture the app uses (read, grab, isOpened, release) and
+exposes fps, frame_count (None when unknown), width, height and position, the index of the next frame.
+Sources that cannot seek return False from seek. ready() tells the Tk thread whether read would block.
+
+    open_source("clip.mp4")
+    open_source("frames/")                                  # frame_0001.png, frame_0002.png, ...
+    open_source("-", raw_size=(1920, 1080), fps=25)         # ffmpeg ... -f rawvideo -pix_fmt bgr24 -
+"""
+import numpy as np
+import threading
+import queue
+import cv2
+import sys
+import os
+import re
+
+from concurrent.futures import ThreadPoolExecutor
+from logger_setup import setup_logger
+from collections import deque
+
+logger = setup_logger(__name__)
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff", ".webp")
+PIPE_PREFETCH = 8
+
+class FrameSource:
+    """Base class for sources of BGR frames."""
+    seekable = False
+
+    def __init__(self, fps=30.0, frame_count=None, width=0, height=0):
+        self.fps = fps
+        self.frame_count = frame_count
+        self.width = width
+        self.height = height
+        self.position = 0
+
+    def isOpened(self):
+        return True
+
+    def ready(self):
+        """Return True if read can return without waiting for the producer."""
+        return True
+
+    def read(self):
+        """Return (ret, frame) for the next frame."""
+        raise NotImplementedError
+
+    def grab(self):
+        """Skip the next frame; returns False at the end of the source."""
+        return self.read()[0]
+
+    def seek(self, index):
+        """Position the source so the next read returns frame index."""
+        return False
+
+    def release(self):
+        pass
+
+    def describe(self):
+        count = self.frame_count if self.frame_count is not None else "unknown"
+        return f"{self.width}x{self.height}, {self.fps:.2f} FPS, {count} frames"
+
+class VideoFileSource(FrameSource):
+    """A video file decoded with cv2.VideoCapture."""
+    seekable = True
+
+    def __init__(self, path):
+        self.path = path
+        self.vid = cv2.VideoCapture(path)
+        if not self.vid.isOpened():
+            raise IOError(f"Failed to open video file {path}")
+        super().__init__(
+            fps=self.vid.get(cv2.CAP_PROP_FPS) or 30.0,
+            frame_count=int(self.vid.get(cv2.CAP_PROP_FRAME_COUNT)) or None,
+            width=int(self.vid.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            height=int(self.vid.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        )
+
+    def isOpened(self):
+        return self.vid is not None and self.vid.isOpened()
+
+    def read(self):
+        ret, frame = self.vid.read()
+        if ret:
+            self.position += 1
+        return ret, frame
+
+    def grab(self):
+        ret = self.vid.grab()
+        if ret:
+            self.position += 1
+        return ret
+
+    def seek(self, index):
+        if not self.vid.set(cv2.CAP_PROP_POS_FRAMES, index):
+            return False
+        self.position = int(self.vid.get(cv2.CAP_PROP_POS_FRAMES))
+        return True
+
+    def release(self):
+        if self.vid is not None:
+            self.vid.release()
+            self.vid = None
+
+def _natural_key(name):
+    return [int(part) if part.isdigit() else part.lower() for part in re.split(r"(\d+)", name)]
+
+class ImageSequenceSource(FrameSource):
+    """A directory of numbered images, decoded ahead of playback in a thread pool.
+
+    Files are ordered by the numbers in their names, so frame_2.png sorts before frame_10.png. Files
+    OpenCV has no reader for are left out up front, so frame numbers stay in step with the file list; a
+    file that passes that check but then fails to decode gives a failed read at its index.
+    """
+    seekable = True
+
+    def __init__(self, directory, fps=30.0, prefetch=8, workers=4):
+        self.directory = directory
+        names = sorted((name for name in os.listdir(directory) if name.lower().endswith(IMAGE_EXTENSIONS)),
+                       key=_natural_key)
+        if not names:
+            raise IOError(f"No images found in {directory}")
+        self.files = []
+        for name in names:
+            if cv2.haveImageReader(os.path.join(directory, name)):
+                self.files.append(name)
+            else:
+                logger.warning(f"Skipping unreadable image {name}")
+        if not self.files:
+            raise IOError(f"No readable images found in {directory}")
+        self.prefetch = prefetch
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sequence-decode")
+        self.pending = deque()
+        first = self._decode(0)
+        if first is None:
+            raise IOError(f"Failed to read image {self.files[0]}")
+        super().__init__(fps=fps, frame_count=len(self.files), width=first.shape[1], height=first.shape[0])
+
+    def _decode(self, index):
+        return cv2.imread(os.path.join(self.directory, self.files[index]), cv2.IMREAD_COLOR)
+
+    def _fill(self):
+        next_index = self.position + len(self.pending)
+        while len(self.pending) < self.prefetch and next_index < len(self.files):
+            self.pending.append(self.executor.submit(self._decode, next_index))
+            next_index += 1
+
+    def isOpened(self):
+        return self.executor is not None
+
+    def read(self):
+        self._fill()
+        if not self.pending:
+            return False, None
+        frame = self.pending.popleft().result()
+        self.position += 1
+        if frame is None:
+            logger.error(f"Failed to decode image {self.files[self.position - 1]} (frame {self.position - 1})")
+            return False, None
+        return True, frame
+
+    def grab(self):
+        if self.position >= len(self.files):
+            return False
+        if self.pending:
+            self.pending.popleft().cancel()
+        self.position += 1
+        return True
+
+    def seek(self, index):
+        for future in self.pending:
+            future.cancel()
+        self.pending.clear()
+        self.position = max(0, min(index, len(self.files)))
+        return True
+
+    def release(self):
+        if self.executor is not None:
+            self.seek(self.position)
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+class RawPipeSource(FrameSource):
+    """Raw bgr24 frames of a fixed size read from a binary stream, by default stdin.
+
+    A reader thread fills a bounded queue of up to prefetch frames, so a stalled producer blocks that
+    thread rather than the caller of read. The stream cannot seek; frame_count is None unless given.
+    """
+    def __init__(self, width, height, fps=30.0, stream=None, frame_count=None, prefetch=PIPE_PREFETCH):
+        super().__init__(fps=fps, frame_count=frame_count, width=width, height=height)
+        self.stream = stream if stream is not None else sys.stdin.buffer
+        self.frame_bytes = width * height * 3
+        self.closed = False
+        self.frames = queue.Queue(maxsize=prefetch)
+        self.finished = threading.Event()
+        self.thread = threading.Thread(target=self._read_frames, name="raw-pipe-reader", daemon=True)
+        self.thread.start()
+
+    def isOpened(self):
+        return not self.closed
+
+    def _read_exact(self, buffer):
+        view = memoryview(buffer)
+        got = 0
+        while got < len(buffer):
+            n = self.stream.readinto(view[got:])
+            if not n:
+                break
+            got += n
+        return got
+
+    def _read_frames(self):
+        try:
+            while not self.closed:
+                buffer = bytearray(self.frame_bytes)
+                got = self._read_exact(buffer)
+                if got < self.frame_bytes:
+                    if got:
+                        logger.warning(f"Discarding truncated frame of {got} bytes at the end of the stream")
+                    break
+                frame = np.frombuffer(buffer, dtype=np.uint8).reshape(self.height, self.width, 3)
+                while not self.closed:
+                    try:
+                        self.frames.put(frame, timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+        except (OSError, ValueError) as e:
+            logger.error(f"Error reading raw frames: {e}")
+        finally:
+            self.finished.set()
+
+    def ready(self):
+        return self.closed or self.finished.is_set() or not self.frames.empty()
+
+    def read(self):
+        while not self.closed:
+            try:
+                frame = self.frames.get(timeout=0.1)
+            except queue.Empty:
+                if self.finished.is_set() and self.frames.empty():
+                    self.closed = True
+                continue
+            self.position += 1
+            return True, frame
+        return False, None
+
+    def release(self):
+        self.closed = True
+
+def parse_size(value):
+    """Parse a WIDTHxHEIGHT size such as "1920x1080"."""
+    try:
+        width, height = (int(v) for v in value.lower().split("x"))
+    except ValueError:
+        raise ValueError(f"Invalid size {value!r}; expected WIDTHxHEIGHT")
+    return width, height
+
+def open_source(spec, fps=None, raw_size=None):
+    """Open "-" (raw frames on stdin, needs raw_size), a directory of images or a video file."""
+    if spec == "-":
+        if raw_size is None:
+            raise ValueError("Reading raw frames from stdin needs the frame size")
+        return RawPipeSource(*raw_size, fps=fps or 30.0)
+    if os.path.isdir(spec):
+        return ImageSequenceSource(spec, fps=fps or 30.0)
+    source = VideoFileSource(spec)
+    if fps:
+        source.fps = fps
+    return source
@@ -0,0 +1,110 @@
+import tkinter as tk
+import os
+
+from logger_setup import setup_logger
+from PIL import ImageTk
+
+logger = setup_logger(__name__)
+
+GALLERY_COLUMNS = 5
+
+class GalleryWindow:
+    """Thumbnail gallery of queued images that fills in as results arrive from the ImageWorkQueue.
+
+    Clicking a thumbnail, or Left/Right in the gallery, shows the cached result in the main window.
+    """
+    def __init__(self, app, work_queue):
+        self.app = app
+        self.work_queue = work_queue
+        self.tiles = {}
+        self.photos = {}
+        self.selected = None
+
+        self.top = tk.Toplevel(app.window)
+        self.top.title("Image Gallery")
+        self.top.geometry("700x450")
+        self.top.protocol("WM_DELETE_WINDOW", self.top.withdraw)
+
+        toolbar = tk.Frame(self.top)
+        toolbar.pack(side=tk.TOP, fill=tk.X, padx=10, pady=5)
+        self.status_label = tk.Label(toolbar, text="", anchor="w")
+        self.status_label.pack(side=tk.LEFT)
+        self.btn_export_all = tk.Button(toolbar, text="Export All", width=12, relief="groove", bd=2,
+                                        command=self.app.export_gallery)
+        self.btn_export_all.pack(side=tk.RIGHT)
+
+        self.canvas = tk.Canvas(self.top, highlightthickness=0)
+        scrollbar = tk.Scrollbar(self.top, orient=tk.VERTICAL, command=self.canvas.yview)
+        self.canvas.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.grid_frame = tk.Frame(self.canvas)
+        self.canvas.create_window((0, 0), window=self.grid_frame, anchor=tk.NW)
+        self.grid_frame.bind('<Configure>', lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all")))
+
+        self.top.bind('<Left>', lambda e: self.step(-1))
+        self.top.bind('<Right>', lambda e: self.step(1))
+        self._poll()
+
+    def add(self, results):
+        """Add tiles for results that are not shown yet and bring the gallery to the front."""
+        for result in results:
+            if result.path in self.tiles:
+                continue
+            index = len(self.tiles)
+            tile = tk.Button(self.grid_frame, text=os.path.basename(result.path)[:16], width=16, height=6,
+                             relief="groove", bd=2, compound=tk.TOP, wraplength=120,
+                             command=lambda path=result.path: self.select(path))
+            tile.grid(row=index // GALLERY_COLUMNS, column=index % GALLERY_COLUMNS, padx=4, pady=4)
+            self.tiles[result.path] = tile
+        self.top.deiconify()
+        self.top.lift()
+        self._update_status()
+
+    def _update_tile(self, result):
+        tile = self.tiles.get(result.path)
+        if tile is None:
+            return
+        if result.status == "done":
+            photo = ImageTk.PhotoImage(result.thumbnail)
+            self.photos[result.path] = photo
+            tile.config(image=photo, width=0, height=0, text=f"{os.path.basename(result.path)[:16]} ({len(result.landmarks)})")
+        elif result.status == "failed":
+            tile.config(text=f"{os.path.basename(result.path)[:16]}\nfailed", fg="red")
+
+    def _poll(self):
+        """Display results that finished since the last poll."""
+        if not self.top.winfo_exists():
+            return
+        for result in self.work_queue.completed():
+            if self.work_queue.results.get(result.path) is not result:
+                continue
+            self._update_tile(result)
+            if result.path == self.selected:
+                self.select(result.path)
+        self._update_status()
+        self.top.after(100, self._poll)
+
+    def _update_status(self):
+        total = len(self.work_queue.results)
+        pending = self.work_queue.pending()
+        self.status_label.config(text=f"{total - pending}/{total} processed" if pending else f"{total} images")
+
+    def select(self, path):
+        """Show the cached result of path in the main window, or wait for it if it is still queued."""
+        previous = self.tiles.get(self.selected)
+        if previous is not None:
+            previous.config(relief="groove")
+        self.selected = path
+        self.tiles[path].config(relief="sunken")
+        result = self.work_queue.results[path]
+        if result.status == "done":
+            self.app.show_gallery_image(result)
+
+    def step(self, delta):
+        """Select the image delta positions away from the current one."""
+        paths = list(self.tiles)
+        if not paths:
+            return
+        index = paths.index(self.selected) + delta if self.selected in paths else 0
+        self.select(paths[index % len(paths)])
@@ -0,0 +1,38 @@
+import mediapipe as mp
+import os
+
+from profiles import apply_profile, DEFAULT_PROFILE
+from frame_diff import StaticFrameDetector, DEFAULT_STATIC_THRESHOLD
+from landmark_cache import close_landmark_cache
+
+class HeadlessApp:
+    """The subset of LandmarkDetectorApp state used by media_processor and the export path, without a Tk window."""
+    def __init__(self, landmarks_dir="landmarks", profile=DEFAULT_PROFILE, regions=None,
+                 static_threshold=DEFAULT_STATIC_THRESHOLD):
+        self.landmarks_dir = landmarks_dir
+        if not os.path.exists(self.landmarks_dir):
+            os.makedirs(self.landmarks_dir)
+
+        self.vid = None
+        self.video_path = None
+        self.all_landmarks = []
+        self.frame_count = 0
+        self.realtime_capture = True
+        self.source_mode = "video"
+        self.regions = regions
+        self.static_detector = StaticFrameDetector(static_threshold)
+        self.inference_workers = None
+        self.landmark_cache = None
+
+        self.mp_face_mesh = mp.solutions.face_mesh
+        self.mp_drawing = mp.solutions.drawing_utils
+        apply_profile(self, profile)
+
+    def close(self):
+        """Release the video, the landmark cache and the FaceMesh graphs."""
+        if self.vid:
+            self.vid.release()
+            self.vid = None
+        close_landmark_cache(self)
+        self.face_mesh_image.close()
+        self.face_mesh_video.close()
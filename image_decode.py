@@ -0,0 +1,32 @@
+import cv2
+
+from PIL import Image
+
+# Decoder-side reductions, largest first; JPEG decoders scale these in the DCT instead of resizing pixels
+REDUCED_MODES = [(8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4), (2, cv2.IMREAD_REDUCED_COLOR_2)]
+
+def decode_image(path):
+    """Decode an image file once at full resolution as BGR."""
+    image = cv2.imread(path, cv2.IMREAD_COLOR)
+    if image is None:
+        raise IOError(f"Failed to read image {path}")
+    return image
+
+def preview_reduction(image_size, display_size):
+    """Return the largest decoder reduction that still leaves at least display_size pixels, whatever the orientation."""
+    long_side, short_side = max(image_size), min(image_size)
+    display_long, display_short = max(display_size), min(display_size)
+    for factor, mode in REDUCED_MODES:
+        if long_side // factor >= display_long and short_side // factor >= display_short:
+            return factor, mode
+    return 1, cv2.IMREAD_COLOR
+
+def decode_preview(path, display_size):
+    """Decode a display_size BGR preview of an image file, reading as few pixels as the format allows."""
+    with Image.open(path) as image:
+        image_size = image.size
+    _, mode = preview_reduction(image_size, display_size)
+    preview = cv2.imread(path, mode)
+    if preview is None:
+        raise IOError(f"Failed to read image {path}")
+    return cv2.resize(preview, tuple(display_size), interpolation=cv2.INTER_AREA)
@@ -1,14 +1,210 @@
+import mediapipe as mp
+import numpy as np
+import threading
 import logging
 import cv2
 import os
 
+from concurrent.futures import ThreadPoolExecutor
+from mediapipe.framework.formats import landmark_pb2
+from resolution_policy import IMAGE_POLICY
 from logger_setup import setup_logger
 from PIL import Image, ImageTk
 
 logger = setup_logger(__name__)
 
-def detect_landmarks_on_image(self, image_path, face_mesh_image, mp_drawing, mp_face_mesh, ui):
-    """Detect landmarks on a loaded image."""
+DEFAULT_SCALES = [0.75, 1.0, 1.25, 1.5]
+TILED_MIN_PIXELS = 12_000_000
+TILE_SIZE = 1024
+TILE_OVERLAP = 256
+TILE_WORKERS = 4
+TILE_MERGE_IOU = 0.3
+
+tile_executor = ThreadPoolExecutor(max_workers=TILE_WORKERS)
+_tile_models = threading.local()
+
+TILE_FACE_MESH_CONFIG = {
+    "static_image_mode": True,
+    "max_num_faces": 5,
+    "refine_landmarks": True,
+    "min_detection_confidence": 0.5,
+}
+
+def needs_tiling(width, height):
+    """Return True when an image is large enough to be detected in tiles."""
+    return width * height >= TILED_MIN_PIXELS
+
+def _tile_face_mesh(config):
+    """Return the calling tile worker thread's FaceMesh for the given FaceMesh keyword arguments."""
+    meshes = getattr(_tile_models, 'meshes', None)
+    if meshes is None:
+        meshes = _tile_models.meshes = {}
+    key = tuple(sorted(config.items()))
+    face_mesh = meshes.get(key)
+    if face_mesh is None:
+        face_mesh = meshes[key] = mp.solutions.face_mesh.FaceMesh(**config)
+    return face_mesh
+
+def _tile_origins(length, tile_size, overlap):
+    """Return tile start offsets covering length with the given overlap, the last tile flush with the edge."""
+    if length <= tile_size:
+        return [0]
+    step = tile_size - overlap
+    origins = list(range(0, length - tile_size, step))
+    origins.append(length - tile_size)
+    return origins
+
+def _detect_tile(config, image_rgb, x0, y0, x1, y1, image_width, image_height, scale=1.0):
+    """Run FaceMesh on one tile and return (landmarks, margin) pairs in global pixel coordinates."""
+    tile = image_rgb[y0:y1, x0:x1]
+    if scale != 1.0:
+        tile = cv2.resize(tile, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    results = _tile_face_mesh(config).process(np.ascontiguousarray(tile))
+    if not results.multi_face_landmarks:
+        return []
+
+    tile_w, tile_h = x1 - x0, y1 - y0
+    interior_edges = []
+    if x0 > 0:
+        interior_edges.append(('x', x0))
+    if x1 < image_width:
+        interior_edges.append(('x', x1))
+    if y0 > 0:
+        interior_edges.append(('y', y0))
+    if y1 < image_height:
+        interior_edges.append(('y', y1))
+
+    faces = []
+    for face_landmarks in results.multi_face_landmarks:
+        points = np.array([(lm.x, lm.y, lm.z) for lm in face_landmarks.landmark], dtype=np.float32)
+        points[:, 0] = points[:, 0] * tile_w + x0
+        points[:, 1] = points[:, 1] * tile_h + y0
+        points[:, 2] = points[:, 2] * tile_w / image_width
+
+        min_x, min_y = points[:, 0].min(), points[:, 1].min()
+        max_x, max_y = points[:, 0].max(), points[:, 1].max()
+        margin = float('inf')
+        for axis, edge in interior_edges:
+            low, high = (min_x, max_x) if axis == 'x' else (min_y, max_y)
+            margin = min(margin, abs(low - edge), abs(high - edge))
+        faces.append((points, margin))
+    return faces
+
+def _bbox_iou(a, b):
+    """Intersection over union of the bounding boxes of two landmark arrays."""
+    ax0, ay0 = a[:, 0].min(), a[:, 1].min()
+    ax1, ay1 = a[:, 0].max(), a[:, 1].max()
+    bx0, by0 = b[:, 0].min(), b[:, 1].min()
+    bx1, by1 = b[:, 0].max(), b[:, 1].max()
+    iw = max(0.0, min(ax1, bx1) - max(ax0, bx0))
+    ih = max(0.0, min(ay1, by1) - max(ay0, by0))
+    inter = iw * ih
+    union = (ax1 - ax0) * (ay1 - ay0) + (bx1 - bx0) * (by1 - by0) - inter
+    return inter / union if union > 0 else 0.0
+
+def merge_tile_faces(faces, iou_threshold=TILE_MERGE_IOU):
+    """Merge duplicate faces found in overlapping tiles, keeping the copy furthest from a tile seam."""
+    merged = []
+    for points, margin in sorted(faces, key=lambda face: face[1], reverse=True):
+        if all(_bbox_iou(points, kept) < iou_threshold for kept in merged):
+            merged.append(points)
+    return merged
+
+def detect_landmarks_tiled(image_rgb, profile=None, tile_size=TILE_SIZE, overlap=TILE_OVERLAP):
+    """Detect faces on a large RGB image by running FaceMesh over overlapping tiles in parallel.
+
+    Returns a list of (N, 3) landmark arrays with x/y in global pixel coordinates. The tile FaceMeshes
+    use the profile's settings when one is given. A downscaled overview pass is included so faces
+    larger than a tile are still found.
+    """
+    config = profile.face_mesh_config(static_image_mode=True) if profile else TILE_FACE_MESH_CONFIG
+    height, width = image_rgb.shape[:2]
+    futures = []
+    for y0 in _tile_origins(height, tile_size, overlap):
+        for x0 in _tile_origins(width, tile_size, overlap):
+            x1, y1 = min(x0 + tile_size, width), min(y0 + tile_size, height)
+            futures.append(tile_executor.submit(_detect_tile, config, image_rgb, x0, y0, x1, y1, width, height))
+
+    overview_scale = min(1.0, tile_size / max(width, height))
+    overview = tile_executor.submit(_detect_tile, config, image_rgb, 0, 0, width, height, width, height, overview_scale)
+    logging.info(f"Tiled detection: {len(futures)} tiles of {tile_size}px with {overlap}px overlap")
+
+    faces = []
+    for future in futures:
+        faces.extend(future.result())
+    faces.extend((points, overlap / 2) for points, _ in overview.result())
+
+    merged = merge_tile_faces(faces)
+    logging.info(f"Tiled detection: {len(faces)} candidate faces merged into {len(merged)}")
+    return merged
+
+def to_landmark_list(points, width, height):
+    """Convert a global pixel landmark array back to a NormalizedLandmarkList for drawing."""
+    landmark_list = landmark_pb2.NormalizedLandmarkList()
+    for x, y, z in points:
+        landmark_list.landmark.add(x=float(x) / width, y=float(y) / height, z=float(z))
+    return landmark_list
+
+def _detect_landmarks_tiled_on_image(self, image, mp_drawing, mp_face_mesh, ui):
+    """Tiled variant of detect_landmarks_on_image for very large images."""
+    height, width = image.shape[:2]
+    image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    faces = detect_landmarks_tiled(image_rgb, getattr(self, 'profile', None))
+    if not faces:
+        logging.warning("No faces detected in the image")
+        return
+
+    logging.info(f"Found {len(faces)} faces")
+    landmark_spec = mp_drawing.DrawingSpec(color=(255, 0, 0), thickness=2, circle_radius=1)
+    connection_spec = mp_drawing.DrawingSpec(color=(0, 0, 255), thickness=2)
+
+    overlay = image_rgb.copy()
+    for face_idx, points in enumerate(faces):
+        mp_drawing.draw_landmarks(
+            image=overlay,
+            landmark_list=to_landmark_list(points, width, height),
+            connections=mp_face_mesh.FACEMESH_CONTOURS,
+            landmark_drawing_spec=landmark_spec,
+            connection_drawing_spec=connection_spec,
+        )
+        for idx, (x, y, _) in enumerate(points):
+            self.all_landmarks.append({"face_index": face_idx, "landmark_id": idx, "x": round(float(x), 2), "y": round(float(y), 2)})
+
+    alpha = 0.6
+    display_image = cv2.addWeighted(overlay, alpha, image_rgb, 1 - alpha, 0)
+
+    self.image = Image.fromarray(display_image)
+    self.image = self.image.resize((ui.canvas_width, ui.canvas_height), Image.Resampling.LANCZOS)
+    self.photo = ImageTk.PhotoImage(self.image)
+    ui.canvas.create_image(0, 0, image=self.photo, anchor="nw")
+    ui.canvas.image = self.photo
+
+    self.export_to_json()
+    logging.info(f"Total landmarks processed: {len(self.all_landmarks)}")
+
+def detect_multi_scale(face_mesh_image, image_rgb, scales=None):
+    """Run face_mesh_image on image_rgb at each scale. Returns (results, face count, scale) for the scale that found the most faces."""
+    scales = scales or DEFAULT_SCALES
+    best_results = None
+    max_faces = 0
+    
+    logging.info(f"Attempting detection at scales: {scales}")
+    
+    best_scale = 1.0
+    for scale in scales:
+        logging.info(f"Trying scale: {scale}")
+        scaled_image = cv2.resize(image_rgb, (0, 0), fx=scale, fy=scale, interpolation=cv2.INTER_AREA if scale < 1.0 else cv2.INTER_LINEAR)
+        results = face_mesh_image.process(scaled_image)
+        
+        if results.multi_face_landmarks and len(results.multi_face_landmarks) > max_faces:
+            best_results = results
+            max_faces = len(results.multi_face_landmarks)
+            best_scale = scale
+            logging.info(f"New best result at scale {scale}: found {max_faces} faces")
+    return best_results, max_faces, best_scale
+
+def detect_landmarks_on_image(self, image_path, face_mesh_image, mp_drawing, mp_face_mesh, ui, tiled=None, policy=None, scales=None):
+    """Detect landmarks on a loaded image. Images of TILED_MIN_PIXELS or more use tiled detection unless tiled is given."""
     try:
         self.all_landmarks = []
         
@@ -24,20 +220,18 @@ def detect_landmarks_on_image(self, image_path, face_mesh_image, mp_drawing, mp_
         orig_image = image.copy()
         orig_height, orig_width = orig_image.shape[:2]
         logging.info(f"Original image dimensions: {orig_width}x{orig_height}")
+
+        if tiled is None:
+            tiled = needs_tiling(orig_width, orig_height)
+        if tiled:
+            _detect_landmarks_tiled_on_image(self, orig_image, mp_drawing, mp_face_mesh, ui)
+            return
         
-        if width < 640 or height < 480:
-            scale_factor = max(640 / width, 480 / height)
-            image = cv2.resize(image, None, fx=scale_factor, fy=scale_factor, interpolation=cv2.INTER_CUBIC)
-            logging.info(f"Upscaling image by factor {scale_factor:.2f} for better detection")
-            height, width = image.shape[:2]
-        
-        if width < 1024 or height < 768:
-                additional_scale = 1.5
-                if scale_factor * additional_scale > 3.0:
-                    additional_scale = 3.0 / scale_factor
-                logging.info(f"Additional upscaling by factor {additional_scale:.2f} for improved detection in low resolution")
-                image = cv2.resize(image, None, fx=additional_scale, fy=additional_scale, interpolation=cv2.INTER_CUBIC)
-                height, width = image.shape[:2]
+        policy = policy or IMAGE_POLICY
+        decision = policy.choose(orig_width, orig_height, label=os.path.basename(image_path))
+        image = policy.resize(image, decision)
+        scale_factor = decision.scale
+        height, width = image.shape[:2]
         
         if height > width:
             min_face_size = int(min(height, width) * 0.03)
@@ -51,28 +245,11 @@ def detect_landmarks_on_image(self, image_path, face_mesh_image, mp_drawing, mp_
         image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
         logging.info(f"RGB image shape: {image_rgb.shape}")
         
-        display_image = image_rgb.copy()
-        
-        scales = [0.75, 1.0, 1.25, 1.5]
-        best_results = None
-        max_faces = 0
+        display_image = cv2.cvtColor(orig_image, cv2.COLOR_BGR2RGB)
         
-        logging.info(f"Attempting detection at scales: {scales}")
-        
-        best_scale = 1.0
-        for scale in scales:
-            logging.info(f"Trying scale: {scale}")
-            scaled_image = cv2.resize(image_rgb, (0, 0), fx=scale, fy=scale)
-            results = face_mesh_image.process(scaled_image)
-            
-            if results.multi_face_landmarks and len(results.multi_face_landmarks) > max_faces:
-                best_results = results
-                max_faces = len(results.multi_face_landmarks)
-                best_scale = scale
-                logging.info(f"New best result at scale {scale}: found {max_faces} faces")
+        best_results, max_faces, best_scale = detect_multi_scale(face_mesh_image, image_rgb, scales)
         
         results = best_results if best_results else face_mesh_image.process(image_rgb)
-        overall_scale = scale_factor * best_scale
         
         logging.info(f"Face detection results: {results}")
         logging.info(f"Multi face landmarks present: {results.multi_face_landmarks is not None}")
@@ -120,15 +297,13 @@ def detect_landmarks_on_image(self, image_path, face_mesh_image, mp_drawing, mp_
                     connection_drawing_spec=connection_spec,
                 )
                 for idx, landmark in enumerate(face_landmarks.landmark):
-                    x = (landmark.x * width) / overall_scale
-                    y = (landmark.y * height) / overall_scale
+                    x = landmark.x * orig_width
+                    y = landmark.y * orig_height
                     self.all_landmarks.append({"face_index": face_idx, "landmark_id": idx, "x": round(x, 2), "y": round(y, 2)})
                 logging.info(f"Face {face_idx + 1}: Processed {len(face_landmarks.landmark)} landmarks")
             
             alpha = 0.6
             display_image = cv2.addWeighted(overlay, alpha, display_image, 1 - alpha, 0)
-            display_image = cv2.resize(display_image, (orig_width, orig_height), interpolation=cv2.INTER_AREA)
-            logging.info("Restored image to original dimensions")
             
             self.image = Image.fromarray(display_image)
             self.image = self.image.resize((ui.canvas_width, ui.canvas_height), Image.Resampling.LANCZOS)
@@ -155,8 +330,8 @@ def detect_landmarks_on_image(self, image_path, face_mesh_image, mp_drawing, mp_
                         connection_drawing_spec=mp_drawing.DrawingSpec(color=(0, 0, 255), thickness=2)
                     )
                     for idx, landmark in enumerate(face_landmarks.landmark):
-                        x = landmark.x * width
-                        y = landmark.y * height
+                        x = landmark.x * orig_width
+                        y = landmark.y * orig_height
                         self.all_landmarks.append({"landmark_id": idx, "x": x, "y": y})
                 
                 self.image = Image.fromarray(display_image)
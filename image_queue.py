@@ -0,0 +1,124 @@
+import threading
+import logging
+import queue
+import cv2
+import os
+
+from concurrent.futures import ThreadPoolExecutor
+from media_processor import detect_landmarks_on_image
+from image_decode import decode_image, decode_preview
+from collections import OrderedDict
+from PIL import Image
+
+THUMBNAIL_SIZE = (120, 90)
+IMAGE_QUEUE_WORKERS = 2
+
+class ImageResult:
+    """Detection result, preview and thumbnail of one queued image."""
+    def __init__(self, path, key):
+        self.path = path
+        self.key = key
+        self.status = "queued"
+        self.preview = None
+        self.thumbnail = None
+        self.landmarks = []
+        self.frame_size = None
+        self.error = None
+
+class ImageWorkQueue:
+    """Runs image landmark detection in a background thread pool and caches the results per image.
+
+    Results are keyed on the profile and regions they were detected with; requeue re-runs images whose
+    key no longer matches. Each worker thread owns a static-mode FaceMesh for the current profile.
+    Finished results are handed to the Tk thread through completed().
+    """
+    def __init__(self, app, display_size, workers=IMAGE_QUEUE_WORKERS):
+        self.app = app
+        self.display_size = display_size
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="image-queue")
+        self.results = OrderedDict()
+        self.finished = queue.Queue()
+        self._models = threading.local()
+        self._face_meshes = []
+        self._lock = threading.Lock()
+
+    def settings_key(self):
+        return (self.app.profile.name, tuple(self.app.regions or ()))
+
+    def add(self, paths):
+        """Queue paths that are not cached yet; returns the results of all given paths in order."""
+        for path in paths:
+            if path not in self.results:
+                self._submit(ImageResult(path, self.settings_key()))
+        return [self.results[path] for path in paths]
+
+    def requeue(self):
+        """Re-run detection on every image whose result was produced with other settings."""
+        key = self.settings_key()
+        for result in list(self.results.values()):
+            if result.key != key:
+                self._submit(ImageResult(result.path, key))
+
+    def _submit(self, result):
+        self.results[result.path] = result
+        self.executor.submit(self._process, result)
+
+    def _face_mesh(self, profile):
+        cached = getattr(self._models, 'face_mesh', None)
+        if cached is None or cached[0] is not profile:
+            face_mesh = profile.create_face_mesh(static_image_mode=True)
+            with self._lock:
+                self._face_meshes.append(face_mesh)
+            self._models.face_mesh = cached = (profile, face_mesh)
+        return cached[1]
+
+    def _process(self, result):
+        if self.results.get(result.path) is not result:
+            return
+        try:
+            image = decode_image(result.path)
+            preview = decode_preview(result.path, self.display_size)
+            preview, landmarks = detect_landmarks_on_image(self.app, image, self._face_mesh(self.app.profile), preview)
+            if preview is None:
+                raise RuntimeError("Detection failed")
+            thumbnail = Image.fromarray(cv2.cvtColor(preview, cv2.COLOR_BGR2RGB))
+            thumbnail.thumbnail(THUMBNAIL_SIZE)
+            result.preview = preview
+            result.thumbnail = thumbnail
+            result.landmarks = landmarks
+            result.frame_size = (image.shape[1], image.shape[0])
+            result.status = "done"
+            logging.info(f"Processed queued image {os.path.basename(result.path)}: {len(landmarks)} faces")
+        except Exception as e:
+            result.error = str(e)
+            result.status = "failed"
+            logging.error(f"Error processing queued image {result.path}: {e}")
+        finally:
+            self.finished.put(result)
+
+    def completed(self):
+        """Return the results finished since the last call, for the Tk thread to display."""
+        results = []
+        while True:
+            try:
+                results.append(self.finished.get_nowait())
+            except queue.Empty:
+                return results
+
+    def pending(self):
+        return sum(1 for result in self.results.values() if result.status == "queued")
+
+    def export_records(self):
+        """Return export records for every finished image, numbered by gallery position."""
+        records = []
+        for index, result in enumerate(self.results.values()):
+            if result.status == "done":
+                records.extend({**record, "frame": index, "image": result.path} for record in result.landmarks)
+        return records
+
+    def close(self):
+        """Stop the workers and release their FaceMesh graphs."""
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        for face_mesh in self._face_meshes:
+            face_mesh.close()
+        self._face_meshes = []
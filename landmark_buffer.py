@@ -0,0 +1,97 @@
+import tempfile
+import logging
+import shutil
+import json
+import os
+
+# Rough in-memory footprint of one landmark entry ({"id", "position": {"x", "y", "z"}}) in a face record.
+LANDMARK_RECORD_BYTES = 480
+FACE_RECORD_BYTES = 512
+
+def estimate_record_size(record):
+    """Estimate the in-memory size in bytes of a face record."""
+    return FACE_RECORD_BYTES + len(record.get("landmarks", ())) * LANDMARK_RECORD_BYTES
+
+class LandmarkBuffer:
+    """Append-only store for captured face records that spills older records to chunk files on disk.
+
+    Records stay in memory until their estimated size exceeds memory_limit_mb, after which the oldest
+    records are written to rolling JSON Lines chunk files in a temporary directory under spill_root.
+    Iterating the buffer yields every record in capture order, reading chunks back one line at a time.
+    """
+    def __init__(self, spill_root, memory_limit_mb=256):
+        self.spill_root = spill_root
+        self.memory_limit = memory_limit_mb * 1024 * 1024
+        self.records = []
+        self.memory_size = 0
+        self.chunks = []
+        self.spilled_count = 0
+        self.spill_dir = None
+
+    def __len__(self):
+        return self.spilled_count + len(self.records)
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            with open(chunk, 'r') as f:
+                for line in f:
+                    yield json.loads(line)
+        yield from list(self.records)
+
+    def append(self, record):
+        """Add a face record, spilling to disk if the memory ceiling is exceeded."""
+        self.records.append(record)
+        self.memory_size += estimate_record_size(record)
+        if self.memory_size > self.memory_limit:
+            self.spill()
+
+    def extend(self, records):
+        """Add several face records."""
+        for record in records:
+            self.append(record)
+
+    def spill(self):
+        """Write the older half of the in-memory records to a new chunk file."""
+        count = max(1, len(self.records) // 2)
+        if self.spill_dir is None:
+            os.makedirs(self.spill_root, exist_ok=True)
+            self.spill_dir = tempfile.mkdtemp(prefix="capture_", dir=self.spill_root)
+
+        chunk = os.path.join(self.spill_dir, f"chunk_{len(self.chunks):06d}.jsonl")
+        spilled = self.records[:count]
+        with open(chunk, 'w') as f:
+            for record in spilled:
+                f.write(json.dumps(record, separators=(',', ':')))
+                f.write('\n')
+
+        self.chunks.append(chunk)
+        self.spilled_count += count
+        self.memory_size -= sum(estimate_record_size(record) for record in spilled)
+        del self.records[:count]
+        logging.debug(f"Spilled {count} landmark records to {chunk}")
+
+    def cleanup(self):
+        """Delete spilled chunk files and empty the buffer."""
+        if self.spill_dir is not None:
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+            logging.info(f"Removed {len(self.chunks)} landmark spill chunks from {self.spill_dir}")
+        self.records = []
+        self.memory_size = 0
+        self.chunks = []
+        self.spilled_count = 0
+        self.spill_dir = None
+
+def dump_landmarks_json(metadata, frames, f):
+    """Write metadata and an iterable of frame records to f, matching json.dump(..., indent=2) output."""
+    f.write('{\n  "metadata": ')
+    f.write(json.dumps(metadata, indent=2).replace('\n', '\n  '))
+    f.write(',\n  "frames": [')
+    empty = True
+    for frame in frames:
+        f.write('\n    ' if empty else ',\n    ')
+        f.write(json.dumps(frame, indent=2).replace('\n', '\n    '))
+        empty = False
+    f.write(']\n}' if empty else '\n  ]\n}')
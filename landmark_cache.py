@@ -0,0 +1,154 @@
+"""Persistent per-video landmark store.
+
+Detected faces are appended to landmarks/.cache/<video hash>-<config hash>.lmk as frames are processed,
+so reopening or scrubbing a previously analysed clip serves its landmarks without inference. The video
+hash samples the file size and three 1 MB chunks; the config hash covers the FaceMesh settings, the
+inference resolution and the MediaPipe version. Regions are not part of the key because the store keeps
+every landmark, normalized, as FaceMesh returned it.
+
+Each record is a header (frame, face count, payload size) followed by every face as a length-prefixed
+serialized NormalizedLandmarkList, which protobuf encodes and decodes without a Python loop over the
+landmarks. A record cut short by a crash is truncated away when the store is reopened.
+"""
+import mediapipe as mp
+import hashlib
+import struct
+import json
+import os
+
+from mediapipe.framework.formats import landmark_pb2
+from logger_setup import setup_logger
+
+logger = setup_logger(__name__)
+
+CACHE_DIRNAME = ".cache"
+HASH_CHUNK = 1 << 20
+FLUSH_EVERY = 30
+CACHE_FORMAT = 3
+_HEADER = struct.Struct("<iHI")
+_LENGTH = struct.Struct("<I")
+
+def video_fingerprint(path):
+    """Return a hash of the file size and its first, middle and last megabyte."""
+    size = os.path.getsize(path)
+    digest = hashlib.sha1(str(size).encode())
+    with open(path, 'rb') as f:
+        for offset in sorted({0, max(0, size // 2 - HASH_CHUNK // 2), max(0, size - HASH_CHUNK)}):
+            f.seek(offset)
+            digest.update(f.read(HASH_CHUNK))
+    return digest.hexdigest()[:16]
+
+def detector_fingerprint(profile):
+    """Return a hash of everything that changes the landmarks detected for a video frame."""
+    config = {
+        "face_mesh": profile.face_mesh_config(static_image_mode=False),
+        "target_face_px": profile.target_face_px,
+        "mediapipe_version": mp.__version__,
+        "format": CACHE_FORMAT,
+    }
+    return hashlib.sha1(json.dumps(config, sort_keys=True).encode()).hexdigest()[:12]
+
+class LandmarkCache:
+    """Append-only store of the face landmarks detected per frame of one video and detector config."""
+    def __init__(self, path):
+        self.path = path
+        self.offsets = {}
+        self.pending = 0
+        self.hits = 0
+        self._scan()
+        self.reader = open(path, 'rb')
+        self.writer = open(path, 'ab')
+
+    @classmethod
+    def for_video(cls, video_path, profile, landmarks_dir):
+        cache_dir = os.path.join(landmarks_dir, CACHE_DIRNAME)
+        os.makedirs(cache_dir, exist_ok=True)
+        name = f"{video_fingerprint(video_path)}-{detector_fingerprint(profile)}.lmk"
+        cache = cls(os.path.join(cache_dir, name))
+        cache.video_path = video_path
+        logger.info(f"Landmark cache {name}: {len(cache)} frames stored for {os.path.basename(video_path)}")
+        return cache
+
+    def _scan(self):
+        """Index the records in the file and cut off a trailing partial record."""
+        if not os.path.exists(self.path):
+            open(self.path, 'wb').close()
+            return
+        size = os.path.getsize(self.path)
+        offset = 0
+        with open(self.path, 'rb') as f:
+            while offset + _HEADER.size <= size:
+                f.seek(offset)
+                frame, _, payload = _HEADER.unpack(f.read(_HEADER.size))
+                end = offset + _HEADER.size + payload
+                if end > size:
+                    break
+                self.offsets[frame] = offset
+                offset = end
+        if offset < size:
+            logger.warning(f"Discarding {size - offset} bytes of an incomplete record in {self.path}")
+            with open(self.path, 'r+b') as f:
+                f.truncate(offset)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __contains__(self, frame):
+        return frame in self.offsets
+
+    def get(self, frame):
+        """Return the stored faces of frame as NormalizedLandmarkLists, or None if it was never processed."""
+        offset = self.offsets.get(frame)
+        if offset is None:
+            return None
+        self.hits += 1
+        if self.pending:
+            self.flush()
+        self.reader.seek(offset)
+        _, faces, payload = _HEADER.unpack(self.reader.read(_HEADER.size))
+        data = self.reader.read(payload)
+        landmark_lists = []
+        position = 0
+        for _ in range(faces):
+            (length,) = _LENGTH.unpack_from(data, position)
+            position += _LENGTH.size
+            landmark_lists.append(landmark_pb2.NormalizedLandmarkList.FromString(data[position:position + length]))
+            position += length
+        return landmark_lists
+
+    def put(self, frame, multi_face_landmarks):
+        """Store the faces detected on frame unless the frame is already stored."""
+        if frame in self.offsets:
+            return
+        faces = [face.SerializeToString() for face in multi_face_landmarks]
+        self.offsets[frame] = self.writer.tell()
+        self.writer.write(_HEADER.pack(frame, len(faces), sum(_LENGTH.size + len(face) for face in faces)))
+        for face in faces:
+            self.writer.write(_LENGTH.pack(len(face)) + face)
+        self.pending += 1
+        if self.pending >= FLUSH_EVERY:
+            self.flush()
+
+    def flush(self):
+        self.writer.flush()
+        self.pending = 0
+
+    def close(self):
+        self.writer.close()
+        self.reader.close()
+
+def open_landmark_cache(app, source):
+    """Replace app.landmark_cache with the store for source, or None when source is not a video file."""
+    close_landmark_cache(app)
+    path = getattr(source, 'path', None)
+    if path and os.path.isfile(path):
+        try:
+            app.landmark_cache = LandmarkCache.for_video(path, app.profile, app.landmarks_dir)
+        except OSError as e:
+            logger.warning(f"Landmark cache unavailable for {path}: {e}")
+    return app.landmark_cache
+
+def close_landmark_cache(app):
+    if getattr(app, 'landmark_cache', None) is not None:
+        app.landmark_cache.close()
+    app.landmark_cache = None
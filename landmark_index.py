@@ -0,0 +1,154 @@
+"""Sidecar query index for exported landmark sessions.
+
+An export can write landmark_data_*.index.npz next to its JSON. The index holds one row per face
+(frame, face index, bounding box and centroid in pixels) plus the frame size, so questions such as
+"frames with two or more faces" or "frames where face 0 is in the left third" are answered without
+reading the landmark payload:
+
+    python landmark_index.py landmarks/landmark_data_20250101_120000.index.npz --min-faces 2
+    python landmark_index.py landmarks/landmark_data_20250101_120000.index.npz --face 0 --region left-third
+"""
+import numpy as np
+import argparse
+import json
+import os
+
+NAMED_REGIONS = {
+    "left-third": (0.0, 0.0, 1 / 3, 1.0),
+    "center-third": (1 / 3, 0.0, 2 / 3, 1.0),
+    "right-third": (2 / 3, 0.0, 1.0, 1.0),
+    "top-half": (0.0, 0.0, 1.0, 0.5),
+    "bottom-half": (0.0, 0.5, 1.0, 1.0),
+}
+
+def index_path_for(export_path):
+    """Return the index path that belongs to an export file (.json, .lmks, optionally .gz)."""
+    base = export_path[:-3] if export_path.endswith(".gz") else export_path
+    return os.path.splitext(base)[0] + ".index.npz"
+
+class IndexBuilder:
+    """Collects per-face bounding boxes and centroids while an export is being written."""
+    def __init__(self):
+        self.frames = []
+        self.face_indices = []
+        self.boxes = []
+        self.centroids = []
+
+    def add(self, record):
+        """Add one exported face record; records without landmarks (e.g. hands) are skipped."""
+        landmarks = record.get("landmarks") if isinstance(record, dict) else None
+        if not landmarks:
+            return
+        points = np.array([(lm["position"]["x"], lm["position"]["y"]) for lm in landmarks], dtype=np.float32)
+        self.frames.append(record.get("frame", 0))
+        self.face_indices.append(record.get("face_index", 0))
+        self.boxes.append((*points.min(axis=0), *points.max(axis=0)))
+        self.centroids.append(points.mean(axis=0))
+
+    def write(self, path, metadata):
+        """Write the index atomically to path."""
+        frame_size = metadata.get("frame_size") or (0, 0)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(
+                f,
+                frame=np.array(self.frames, dtype=np.int64),
+                face_index=np.array(self.face_indices, dtype=np.int32),
+                bbox=np.array(self.boxes, dtype=np.float32).reshape(-1, 4),
+                centroid=np.array(self.centroids, dtype=np.float32).reshape(-1, 2),
+                frame_size=np.array(frame_size, dtype=np.int32),
+                metadata=np.array(json.dumps(metadata)),
+            )
+        os.replace(tmp_path, path)
+
+class LandmarkIndex:
+    """Read-only view over an index file with vectorized frame queries."""
+    def __init__(self, path):
+        with np.load(path) as data:
+            self.frame = data["frame"]
+            self.face_index = data["face_index"]
+            self.bbox = data["bbox"]
+            self.centroid = data["centroid"]
+            self.frame_size = tuple(int(v) for v in data["frame_size"])
+            self.metadata = json.loads(str(data["metadata"]))
+
+    def face_counts(self):
+        """Return a dict of frame number to number of faces."""
+        frames, counts = np.unique(self.frame, return_counts=True)
+        return dict(zip(frames.tolist(), counts.tolist()))
+
+    def frames_with_faces(self, min_faces=1, max_faces=None):
+        """Return sorted frame numbers with between min_faces and max_faces faces."""
+        frames, counts = np.unique(self.frame, return_counts=True)
+        mask = counts >= min_faces
+        if max_faces is not None:
+            mask &= counts <= max_faces
+        return frames[mask].tolist()
+
+    def frames_with_face_in(self, region, face_index=None, by="bbox"):
+        """Return sorted frames where a face (or face_index) lies inside region.
+
+        region is (x0, y0, x1, y1) as fractions of the frame size or a NAMED_REGIONS key. With by="bbox"
+        the whole bounding box must be inside the region, with by="centroid" only its centroid.
+        """
+        if isinstance(region, str):
+            region = NAMED_REGIONS[region]
+        width, height = self.frame_size
+        if not width or not height:
+            raise ValueError("Index has no frame size; region queries need it")
+        x0, y0, x1, y1 = region[0] * width, region[1] * height, region[2] * width, region[3] * height
+
+        if by == "centroid":
+            cx, cy = self.centroid[:, 0], self.centroid[:, 1]
+            mask = (cx >= x0) & (cx <= x1) & (cy >= y0) & (cy <= y1)
+        else:
+            mask = ((self.bbox[:, 0] >= x0) & (self.bbox[:, 2] <= x1) &
+                    (self.bbox[:, 1] >= y0) & (self.bbox[:, 3] <= y1))
+        if face_index is not None:
+            mask &= self.face_index == face_index
+        return np.unique(self.frame[mask]).tolist()
+
+def _parse_region(value):
+    if value in NAMED_REGIONS:
+        return value
+    try:
+        region = tuple(float(v) for v in value.split(","))
+    except ValueError:
+        region = ()
+    if len(region) != 4:
+        raise argparse.ArgumentTypeError(f"region must be one of {', '.join(NAMED_REGIONS)} or x0,y0,x1,y1 fractions")
+    return region
+
+def main():
+    parser = argparse.ArgumentParser(description="Query a landmark export index without reading the landmarks.")
+    parser.add_argument("index", help="index file (.index.npz) or the export it belongs to")
+    parser.add_argument("--min-faces", type=int, default=None, help="frames with at least this many faces")
+    parser.add_argument("--max-faces", type=int, default=None, help="frames with at most this many faces")
+    parser.add_argument("--region", type=_parse_region, default=None,
+                        help=f"frames with a face inside {', '.join(NAMED_REGIONS)} or x0,y0,x1,y1 fractions")
+    parser.add_argument("--face", type=int, default=None, help="restrict --region to this face index")
+    parser.add_argument("--by", choices=("bbox", "centroid"), default="bbox", help="what must be inside --region")
+    parser.add_argument("--counts", action="store_true", help="print the face count of every frame")
+    args = parser.parse_args()
+
+    path = args.index if args.index.endswith(".npz") else index_path_for(args.index)
+    index = LandmarkIndex(path)
+
+    if args.counts:
+        for frame, count in index.face_counts().items():
+            print(f"{frame}\t{count}")
+        return
+
+    frames = None
+    if args.min_faces is not None or args.max_faces is not None:
+        frames = set(index.frames_with_faces(args.min_faces or 1, args.max_faces))
+    if args.region is not None:
+        matches = set(index.frames_with_face_in(args.region, args.face, args.by))
+        frames = matches if frames is None else frames & matches
+    if frames is None:
+        parser.error("give --min-faces/--max-faces, --region or --counts")
+    for frame in sorted(frames):
+        print(frame)
+
+if __name__ == "__main__":
+    main()
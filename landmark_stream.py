@@ -0,0 +1,234 @@
+"""Delta-encoded, quantized landmark stream format (.lmks).
+
+Face records are stored per face index as a keyframe every KEYFRAME_INTERVAL records, holding the
+landmark ids and int32 quantized positions, with int16 deltas against the previous reconstructed
+position in between. Deltas are taken from the quantized values, so errors do not accumulate: every
+coordinate is within half a quantization step of the exported value (1/128 px for x and y, 1/2048 for
+z by default). A keyframe is also written when the landmark ids change or a delta overflows int16.
+Records without landmarks, such as hands, are kept as JSON, and records without a frame number, such
+as single-image exports, are flagged so they decode without one.
+
+    python landmark_stream.py landmarks/landmark_data_20250101_120000.lmks --info
+    python landmark_stream.py landmarks/landmark_data_20250101_120000.lmks --to-json decoded.json
+"""
+import numpy as np
+import argparse
+import struct
+import gzip
+import json
+
+MAGIC = b"LMKS"
+VERSION = 1
+KEYFRAME_INTERVAL = 30
+XY_STEP = 1 / 64
+Z_STEP = 1 / 1024
+
+FLAG_KEYFRAME = 1
+FLAG_STATIC = 2
+FLAG_EXTRA = 4
+FLAG_RAW = 8
+FLAG_NO_FRAME = 16
+
+_FILE_HEADER = struct.Struct("<HHffI")
+_RECORD_HEADER = struct.Struct("<iBBH")
+_LENGTH = struct.Struct("<I")
+_INT16_MIN, _INT16_MAX = np.iinfo(np.int16).min, np.iinfo(np.int16).max
+_BASE_KEYS = {"frame", "face_index", "landmarks", "static_skip"}
+
+class LandmarkStreamWriter:
+    """Encodes export records one at a time onto a binary file object."""
+    def __init__(self, f, metadata, keyframe_interval=KEYFRAME_INTERVAL, xy_step=XY_STEP, z_step=Z_STEP):
+        self.f = f
+        self.keyframe_interval = keyframe_interval
+        self.scale = np.array([1 / xy_step, 1 / xy_step, 1 / z_step])
+        self.tracks = {}
+        header = json.dumps(metadata).encode()
+        f.write(MAGIC + _FILE_HEADER.pack(VERSION, keyframe_interval, xy_step, z_step, len(header)) + header)
+
+    def write(self, record):
+        """Encode one export record."""
+        landmarks = record.get("landmarks") if isinstance(record, dict) else None
+        if not landmarks:
+            self._write_json(FLAG_RAW, -1, record.get("face_index", 0), 0, record)
+            return
+
+        frame = record.get("frame")
+        face_index = record.get("face_index", 0)
+        ids = np.array([lm["id"] for lm in landmarks], dtype=np.uint16)
+        positions = np.array([(lm["position"]["x"], lm["position"]["y"], lm["position"]["z"]) for lm in landmarks])
+        quantized = np.rint(positions * self.scale).astype(np.int64)
+
+        flags = FLAG_STATIC if record.get("static_skip") else 0
+        if frame is None:
+            flags |= FLAG_NO_FRAME
+            frame = -1
+        extra = {key: value for key, value in record.items() if key not in _BASE_KEYS}
+        if extra:
+            flags |= FLAG_EXTRA
+
+        track = self.tracks.get(face_index)
+        delta = None
+        if track is not None and track[2] < self.keyframe_interval and np.array_equal(track[0], ids):
+            delta = quantized - track[1]
+            if delta.min() < _INT16_MIN or delta.max() > _INT16_MAX:
+                delta = None
+
+        if delta is None:
+            flags |= FLAG_KEYFRAME
+            payload = ids.tobytes() + quantized.astype(np.int32).tobytes()
+            self.tracks[face_index] = (ids, quantized, 1)
+        else:
+            payload = delta.astype(np.int16).tobytes()
+            self.tracks[face_index] = (ids, quantized, track[2] + 1)
+
+        self.f.write(_RECORD_HEADER.pack(frame, face_index, flags, len(ids)) + payload)
+        if extra:
+            data = json.dumps(extra).encode()
+            self.f.write(_LENGTH.pack(len(data)) + data)
+
+    def _write_json(self, flags, frame, face_index, count, value):
+        data = json.dumps(value).encode()
+        self.f.write(_RECORD_HEADER.pack(frame, face_index, flags, count) + _LENGTH.pack(len(data)) + data)
+
+def write_landmark_stream(metadata, frames, f, **options):
+    """Encode metadata and an iterable of export records to the binary file object f."""
+    writer = LandmarkStreamWriter(f, metadata, **options)
+    for record in frames:
+        writer.write(record)
+
+class LandmarkStream:
+    """A decoded stream: per-record frame numbers, face indices, landmark ids and positions."""
+    def __init__(self, metadata, frames, face_index, flags, ids, positions, extras):
+        self.metadata = metadata
+        self.frames = frames
+        self.face_index = face_index
+        self.flags = flags
+        self.ids = ids
+        self.positions = positions
+        self.extras = extras
+
+    def __len__(self):
+        return len(self.frames)
+
+    def arrays(self):
+        """Return (frames, face_index, ids, positions) for the face records as arrays.
+
+        positions has shape (records, landmarks, 3) and frames is -1 for records without a frame number.
+        Requires every face record to carry the same ids.
+        """
+        faces = [i for i, ids in enumerate(self.ids) if ids is not None]
+        if not faces:
+            return (np.empty(0, dtype=np.int32), np.empty(0, dtype=np.uint8),
+                    np.empty(0, dtype=np.uint16), np.empty((0, 0, 3), dtype=np.float64))
+        ids = self.ids[faces[0]]
+        if any(not np.array_equal(self.ids[i], ids) for i in faces):
+            raise ValueError("Landmark ids change within the stream; use records() instead")
+        return self.frames[faces], self.face_index[faces], ids, np.stack([self.positions[i] for i in faces])
+
+    def records(self):
+        """Yield the records in export form, with the decoded (quantized) coordinates."""
+        for i in range(len(self.frames)):
+            if self.flags[i] & FLAG_RAW:
+                yield self.extras[i]
+                continue
+            record = {} if self.flags[i] & FLAG_NO_FRAME else {"frame": int(self.frames[i])}
+            record["face_index"] = int(self.face_index[i])
+            record["landmarks"] = [{
+                "id": int(idx),
+                "position": {"x": float(x), "y": float(y), "z": float(z)}
+            } for idx, (x, y, z) in zip(self.ids[i], self.positions[i])]
+            if self.flags[i] & FLAG_STATIC:
+                record["static_skip"] = True
+            if self.extras[i]:
+                record.update(self.extras[i])
+            yield record
+
+def read_landmark_stream(path):
+    """Decode a .lmks or .lmks.gz file into a LandmarkStream."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data[:2] == b"\x1f\x8b":
+        data = gzip.decompress(data)
+    if data[:4] != MAGIC:
+        raise ValueError(f"{path} is not a landmark stream")
+    version, _, xy_step, z_step, header_length = _FILE_HEADER.unpack_from(data, 4)
+    if version != VERSION:
+        raise ValueError(f"Unsupported landmark stream version {version}")
+    offset = 4 + _FILE_HEADER.size
+    metadata = json.loads(data[offset:offset + header_length])
+    offset += header_length
+    step = np.array([xy_step, xy_step, z_step])
+
+    frames, face_indices, flags, ids, positions, extras = [], [], [], [], [], []
+    segments = {}
+
+    def finish(segment):
+        indices, values = segment
+        reconstructed = np.cumsum(np.stack(values), axis=0) * step
+        for i, value in zip(indices, reconstructed):
+            positions[i] = value
+
+    while offset < len(data):
+        frame, face_index, record_flags, count = _RECORD_HEADER.unpack_from(data, offset)
+        offset += _RECORD_HEADER.size
+        index = len(frames)
+        frames.append(frame)
+        face_indices.append(face_index)
+        flags.append(record_flags)
+        positions.append(None)
+
+        if record_flags & FLAG_RAW:
+            (length,) = _LENGTH.unpack_from(data, offset)
+            offset += _LENGTH.size
+            extras.append(json.loads(data[offset:offset + length]))
+            offset += length
+            ids.append(None)
+            continue
+
+        if record_flags & FLAG_KEYFRAME:
+            record_ids = np.frombuffer(data, dtype=np.uint16, count=count, offset=offset)
+            offset += record_ids.nbytes
+            values = np.frombuffer(data, dtype=np.int32, count=count * 3, offset=offset).reshape(count, 3)
+            if face_index in segments:
+                finish(segments.pop(face_index))
+            segments[face_index] = ([], [])
+        else:
+            record_ids = ids[segments[face_index][0][-1]]
+            values = np.frombuffer(data, dtype=np.int16, count=count * 3, offset=offset).reshape(count, 3)
+        offset += values.nbytes
+        segments[face_index][0].append(index)
+        segments[face_index][1].append(values.astype(np.int64))
+        ids.append(record_ids)
+
+        extra = None
+        if record_flags & FLAG_EXTRA:
+            (length,) = _LENGTH.unpack_from(data, offset)
+            offset += _LENGTH.size
+            extra = json.loads(data[offset:offset + length])
+            offset += length
+        extras.append(extra)
+
+    for segment in segments.values():
+        finish(segment)
+    return LandmarkStream(metadata, np.array(frames, dtype=np.int32), np.array(face_indices, dtype=np.uint8),
+                          flags, ids, positions, extras)
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or convert a delta-encoded landmark stream.")
+    parser.add_argument("stream", help=".lmks or .lmks.gz file")
+    parser.add_argument("--info", action="store_true", help="print the metadata and record counts")
+    parser.add_argument("--to-json", default=None, help="write the records as a regular JSON export")
+    args = parser.parse_args()
+
+    stream = read_landmark_stream(args.stream)
+    if args.to_json:
+        from landmark_buffer import dump_landmarks_json
+        with open(args.to_json, 'w') as f:
+            dump_landmarks_json(stream.metadata, stream.records(), f)
+    if args.info or not args.to_json:
+        keyframes = sum(1 for flags in stream.flags if flags & FLAG_KEYFRAME)
+        print(json.dumps(stream.metadata, indent=2))
+        print(f"{len(stream)} records, {keyframes} keyframes, {len(np.unique(stream.frames))} frames")
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,26 @@
 import mediapipe as mp
 import tkinter as tk
-import numpy as np
 import datetime
 import logging
-import json
+import shutil
 import cv2
 import os
 
-from media_processor import process_video_frame, detect_landmarks_on_image
+from media_processor import process_video_frame, detect_image_faces, annotate_frame, clear_frame_cache
 
+from screenshot import take_screenshot, take_burst
+from landmark_buffer import LandmarkBuffer
+from export_jobs import submit_export, build_metadata
+from profiles import apply_profile, DEFAULT_PROFILE, PROFILES
+from regions import parse_regions, REGIONS
+from frame_diff import StaticFrameDetector
+from image_decode import decode_image, decode_preview
+from frame_sources import open_source, parse_size
+from landmark_cache import open_landmark_cache, close_landmark_cache
+from playback import PlaybackScheduler
+from sampling_profiler import profiler
+from image_queue import ImageWorkQueue
+from gallery import GalleryWindow
 from tkinter import filedialog
 from PIL import Image, ImageTk
 from ui import UI
@@ -16,7 +28,8 @@ from ui import UI
 logging.basicConfig(level=logging.INFO, format='%(asctime)s: %(levelname)s: %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
 
 class LandmarkDetectorApp:
-    def __init__(self, window, window_title):
+    def __init__(self, window, window_title, profile=DEFAULT_PROFILE, regions=None, source=None, source_fps=None,
+                 raw_size=None):
         self.window = window
         self.window.title(window_title)
 
@@ -30,18 +43,35 @@ class LandmarkDetectorApp:
         if not os.path.exists(self.logs_dir):
             os.makedirs(self.logs_dir)
 
+        self.spill_dir = os.path.join(self.landmarks_dir, ".spill")
+        self._check_leftover_spill()
+        self.capture_memory_limit_mb = 256
+        self.export_jobs = []
+        self.unfinished_exports = []
+        self.image_queue = None
+        self.landmark_cache = None
+        self.gallery = None
+
         self.last_screenshot_time = 0
         self.last_export_time = 0
         self.throttle_delay = 1000
 
         self.vid = None
+        self.video_path = None
         self.image_path = None
+        self.source_mode = "video"
+        self.regions = regions
+        self.static_detector = StaticFrameDetector()
         self.all_landmarks = []
         self.frame_landmarks = []
         self.frame_count = 0
         self.playing = True
         self.delay = 15
-        self.last_frame_time = 0
+        self.scheduler = PlaybackScheduler()
+        self.last_frame = None
+        self.last_source_frame = None
+        self.last_face_landmarks = None
+        self.last_hand_landmarks = None
         self.realtime_capture = False
 
         self.mp_face_mesh = mp.solutions.face_mesh
@@ -56,19 +86,7 @@ class LandmarkDetectorApp:
             min_detection_confidence=0.5
         )
 
-        self.face_mesh_image = self.mp_face_mesh.FaceMesh(
-            static_image_mode=True,
-            max_num_faces=5,
-            refine_landmarks=True,
-            min_detection_confidence=0.5,
-        )
-        self.face_mesh_video = self.mp_face_mesh.FaceMesh(
-            static_image_mode=False,
-            max_num_faces=5,
-            refine_landmarks=True,
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5
-        )
+        apply_profile(self, profile)
 
         self.ui = UI(window, self)
         self.realtime_capture = False
@@ -78,8 +96,15 @@ class LandmarkDetectorApp:
         
         self.window.bind('<space>', lambda e: self.toggle_play_pause())
         self.window.bind('<Control-o>', lambda e: self.load_video())
+        self.window.bind('<Control-O>', lambda e: self.load_image_sequence())
         self.window.bind('<Control-i>', lambda e: self.load_image())
         self.window.bind('<Control-e>', lambda e: self.export_to_json())
+        self.window.bind('<Control-s>', lambda e: take_screenshot(self))
+        self.window.bind('<Control-S>', lambda e: take_burst(self))
+        self.window.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        if source:
+            self.load_source(source, fps=source_fps, raw_size=raw_size)
         
         self.update()
         self.window.mainloop()
@@ -90,19 +115,28 @@ class LandmarkDetectorApp:
             if hasattr(self, 'vid') and self.vid:
                 self.vid.release()
                 self.vid = None
-                self.ui.canvas.delete("all")
-
-            self.image_path = filedialog.askopenfilename(initialdir=".", title="Select an image",
-                                                       filetypes=(("Image files", "*.png;*.jpg;*.jpeg"), ("all files", "*.*")))
-            if self.image_path:
-                logging.info(f"Selected image: {self.image_path}")
-                self.image = Image.open(self.image_path)
-                self.image = self.image.resize((self.ui.canvas_width, self.ui.canvas_height), Image.Resampling.LANCZOS)
-                self.photo = ImageTk.PhotoImage(self.image)
-                self.ui.canvas.create_image(0, 0, image=self.photo, anchor=tk.NW)
-                self.ui.canvas.image = self.photo
+                self.clear_canvas()
+
+            paths = filedialog.askopenfilenames(initialdir=".", title="Select one or more images",
+                                                filetypes=(("Image files", "*.png;*.jpg;*.jpeg"), ("all files", "*.*")))
+            if len(paths) > 1:
+                self.queue_images(paths)
+                return
+            image_path = paths[0] if paths else None
+            if image_path:
+                logging.info(f"Selected image: {image_path}")
+                # A reduced decode is on screen at once; detection works on one full-resolution decode.
+                # The image state is only replaced once both decodes have succeeded.
+                preview_image = decode_preview(image_path, self.ui.display_size())
+                self._show_frame(preview_image)
+                self.window.update_idletasks()
+                source_image = decode_image(image_path)
+                self.image_path = image_path
+                self.source_mode = "image"
+                self.preview_image = preview_image
+                self.source_image = source_image
                 self.detect_landmarks_on_image()
-                logging.info(f"Successfully loaded image: {self.image_path}")
+                logging.info(f"Successfully loaded image: {image_path}")
             else:
                 logging.info("Image selection cancelled")
         except Exception as e:
@@ -114,47 +148,53 @@ class LandmarkDetectorApp:
 
     def load_video(self):
         """Load and process a video file."""
+        file_path = filedialog.askopenfilename(
+            filetypes=[("Video files", "*.mp4 *.avi *.mov"), ("All files", "*.*")]
+        )
+        if file_path:
+            logging.debug("Video file selection initiated")
+            self.load_source(file_path)
+        else:
+            logging.debug("Video file selection dialog closed with no file selected")
+            logging.info("Video selection cancelled")
+
+    def load_image_sequence(self):
+        """Load a directory of numbered images as a video."""
+        directory = filedialog.askdirectory(title="Select a directory of numbered images")
+        if directory:
+            self.load_source(directory)
+        else:
+            logging.info("Image sequence selection cancelled")
+
+    def load_source(self, spec, fps=None, raw_size=None):
+        """Open a frame source (video file, image directory or "-" for raw frames on stdin) and show its first frame."""
         try:
-            file_path = filedialog.askopenfilename(
-                filetypes=[("Video files", "*.mp4 *.avi *.mov"), ("All files", "*.*")]
-            )
-            
-            if file_path:
-                logging.debug("Video file selection initiated")
-                self.vid = cv2.VideoCapture(file_path)
-                
-                if not self.vid.isOpened():
-                    raise Exception("Failed to open video file")
-                    
-                width = int(self.vid.get(cv2.CAP_PROP_FRAME_WIDTH))
-                height = int(self.vid.get(cv2.CAP_PROP_FRAME_HEIGHT))
-                fps = int(self.vid.get(cv2.CAP_PROP_FPS))
-                total_frames = int(self.vid.get(cv2.CAP_PROP_FRAME_COUNT))
-                
-                logging.info(f"Video properties - Width: {width}, Height: {height}, FPS: {fps}, Total Frames: {total_frames}")
-                
-                ret, frame = self.vid.read()
-                if ret:
-                    from media_processor import process_video_frame
-                    frame, _ = process_video_frame(self, frame)
-                    if frame is not None:
-                        image = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-                        image = image.resize((self.ui.canvas_width, self.ui.canvas_height), Image.Resampling.LANCZOS)
-                        photo = ImageTk.PhotoImage(image)
-                        self.ui.canvas.create_image(0, 0, image=photo, anchor=tk.NW)
-                        self.ui.canvas.image = photo
-                
-                self.playing = False
-                self.frame_count = 0
-                self.ui.btn_play_pause.config(state=tk.NORMAL)
-                self.ui.btn_play_pause.config(text="Play")
-                self.ui.enable_frame_controls(True)
-                
-                logging.info(f"Successfully loaded video: {file_path}")
-            else:
-                logging.debug("Video file selection dialog closed with no file selected")
-                logging.info("Video selection cancelled")
-                
+            if self.vid:
+                self.vid.release()
+            self.vid = open_source(spec, fps=fps, raw_size=raw_size)
+            open_landmark_cache(self, self.vid)
+            self.video_path = spec
+            self.source_mode = "video"
+            self.static_detector.reset()
+            self.face_budget.reset()
+
+            logging.info(f"Video properties - {self.vid.describe()}")
+
+            self.frame_count = 0
+            ret, frame = self.vid.read() if self.vid.ready() else (False, None)
+            if ret:
+                frame, _ = process_video_frame(self, frame, self.ui.display_size())
+                if frame is not None:
+                    self._show_frame(frame)
+                self.frame_count = 1
+
+            self.playing = False
+            self.scheduler.reset(self.vid.fps, self.frame_count)
+            self.ui.btn_play_pause.config(state=tk.NORMAL)
+            self.ui.btn_play_pause.config(text="Play")
+            self.ui.enable_frame_controls(True)
+
+            logging.info(f"Successfully loaded video: {spec}")
         except Exception as e:
             logging.error(f"Error loading video: {str(e)}")
             tk.messagebox.showerror("Error", f"Error loading video: {str(e)}")
@@ -162,46 +202,45 @@ class LandmarkDetectorApp:
     def previous_frame(self):
         """Go to previous frame in video."""
         if self.vid and self.vid.isOpened():
-            current_pos = int(self.vid.get(cv2.CAP_PROP_POS_FRAMES))
-            new_pos = max(0, current_pos - 2)
-            self.vid.set(cv2.CAP_PROP_POS_FRAMES, new_pos)
+            new_pos = max(0, self.vid.position - 2)
+            if not self.vid.seek(new_pos):
+                logging.info("This source cannot step backwards")
+                return
+            self.frame_count = new_pos
             ret, frame = self.vid.read()
             if ret:
-                frame, _ = process_video_frame(self, frame)
+                frame, _ = process_video_frame(self, frame, self.ui.display_size())
                 if frame is not None:
-                    image = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-                    self.image = image.resize((self.ui.canvas_width, self.ui.canvas_height), Image.Resampling.LANCZOS)
-                    self.photo = ImageTk.PhotoImage(image=self.image)
-                    self.ui.canvas.create_image(0, 0, image=self.photo, anchor=tk.NW)
-                    self.frame_count = new_pos
+                    self._show_frame(frame)
+                self.frame_count += 1
 
     def next_frame(self):
         """Go to next frame in video."""
         if self.vid and self.vid.isOpened():
+            if not self.vid.ready():
+                logging.info("No frame available from the source yet")
+                return
             ret, frame = self.vid.read()
             if ret:
-                frame, _ = process_video_frame(self, frame)
+                frame, _ = process_video_frame(self, frame, self.ui.display_size())
                 if frame is not None:
-                    image = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-                    self.image = image.resize((self.ui.canvas_width, self.ui.canvas_height), Image.Resampling.LANCZOS)
-                    self.photo = ImageTk.PhotoImage(image=self.image)
-                    self.ui.canvas.create_image(0, 0, image=self.photo, anchor=tk.NW)
-                    self.frame_count += 1
+                    self._show_frame(frame)
+                self.frame_count += 1
 
     def detect_landmarks_on_image(self):
-        """Detect landmarks on a loaded image."""
+        """Detect landmarks on the full-resolution image and draw them on its preview."""
         try:
-            if hasattr(self, 'image_path') and (not hasattr(self, 'vid') or self.vid is None):
-                cv_image = cv2.cvtColor(np.array(self.image), cv2.COLOR_RGB2BGR)
-                
-                # Initialize processed image and landmarks
-                processed_image = cv_image.copy()
+            if self.image_path and self.vid is None:
+                source_image = self.source_image
                 landmarks = []
+                multi_face_landmarks = []
+                multi_hand_landmarks = []
+                self.frame_size = (source_image.shape[1], source_image.shape[0])
                 
                 # Face detection if enabled
                 if self.ui.face_detection_var.get():
                     logging.info("Face detection enabled, processing...")
-                    processed_image, face_landmarks = detect_landmarks_on_image(self, cv_image)
+                    multi_face_landmarks, face_landmarks = detect_image_faces(self, source_image)
                     if face_landmarks:
                         landmarks.extend(face_landmarks)
                         logging.info("Face landmarks detected")
@@ -212,33 +251,14 @@ class LandmarkDetectorApp:
                 if self.ui.hand_detection_var.get():  
                     logging.info("Hand detection enabled, processing...")  
                     try:
-                        height, width = cv_image.shape[:2]
-                        image_rgb = cv2.cvtColor(cv_image, cv2.COLOR_BGR2RGB)
+                        height, width = source_image.shape[:2]
+                        image_rgb = cv2.cvtColor(source_image, cv2.COLOR_BGR2RGB)
                         hand_results = self.hands.process(image_rgb)
                         
                         if hand_results.multi_hand_landmarks:
                             logging.info(f"Found {len(hand_results.multi_hand_landmarks)} hands")  
+                            multi_hand_landmarks = list(hand_results.multi_hand_landmarks)
                             for hand_landmarks, handedness in zip(hand_results.multi_hand_landmarks, hand_results.multi_handedness):
-                                # Create custom drawing styles for hands
-                                hand_landmark_style = self.mp_drawing.DrawingSpec(
-                                    color=(20, 80, 255),  # Deep blue for landmarks
-                                    thickness=2,          # Thinner points
-                                    circle_radius=1       # Smaller circles
-                                )
-                                hand_connection_style = self.mp_drawing.DrawingSpec(
-                                    color=(50, 50, 50),   # Dark gray for connections
-                                    thickness=1           # Thinner lines
-                                )
-                                
-                                # Draw hand landmarks with custom style
-                                self.mp_drawing.draw_landmarks(
-                                    processed_image,
-                                    hand_landmarks,
-                                    self.mp_hands.HAND_CONNECTIONS,
-                                    landmark_drawing_spec=hand_landmark_style,
-                                    connection_drawing_spec=hand_connection_style
-                                )
-                                
                                 # Add hand landmarks to the data
                                 hand_data = {
                                     'handedness': handedness.classification[0].label,
@@ -263,25 +283,62 @@ class LandmarkDetectorApp:
                     except Exception as e:
                         logging.error(f"Error in hand detection: {str(e)}")
                 
-                if processed_image is not None:
-                    processed_pil = Image.fromarray(cv2.cvtColor(processed_image, cv2.COLOR_BGR2RGB))
-                    processed_pil = processed_pil.resize((self.ui.canvas_width, self.ui.canvas_height), Image.Resampling.LANCZOS)
-                    self.photo = ImageTk.PhotoImage(processed_pil)
-                    self.ui.canvas.create_image(0, 0, image=self.photo, anchor=tk.NW)
-                    self.ui.canvas.image = self.photo
-                    self.all_landmarks = landmarks
+                self._show_frame(annotate_frame(self, self.preview_image, multi_face_landmarks, multi_hand_landmarks))
+                self.last_source_frame = source_image
+                self.last_face_landmarks = multi_face_landmarks
+                self.last_hand_landmarks = multi_hand_landmarks
+                self._release_capture_buffer()
+                self.all_landmarks = landmarks
+                profiler.frame_done()
 
         except Exception as e:
             logging.error(f"Error detecting landmarks on image: {e}")
             import traceback
             logging.error(traceback.format_exc())
 
+    def select_profile(self, name):
+        """Switch to a named performance profile and re-run detection on a loaded image."""
+        apply_profile(self, name)
+        if self.image_queue is not None:
+            self.image_queue.requeue()
+        if self.image_path and self.vid is None:
+            self.detect_landmarks_on_image()
+
+    def select_regions(self, regions):
+        """Restrict extraction, drawing and export to the given regions (all landmarks when empty)."""
+        self.regions = regions or None
+        self.static_detector.reset()
+        clear_frame_cache()
+        logging.info(f"Landmark regions: {', '.join(self.regions) if self.regions else 'all'}")
+        if self.image_queue is not None:
+            self.image_queue.requeue()
+        if self.image_path and self.vid is None:
+            self.detect_landmarks_on_image()
+
+    def set_static_skipping(self, enabled):
+        """Turn reuse of landmarks for unchanged video frames on or off."""
+        self.static_detector.enabled = enabled and self.static_detector.threshold > 0
+        self.static_detector.reset()
+        clear_frame_cache()
+        logging.info(f"Static frame skipping {'enabled' if self.static_detector.enabled else 'disabled'}")
+
+    def _show_frame(self, frame):
+        """Display a processed BGR frame on the canvas and keep it as the screenshot buffer."""
+        self.last_frame = frame
+        image = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        image = image.resize((self.ui.canvas_width, self.ui.canvas_height), Image.Resampling.LANCZOS)
+        self.photo = ImageTk.PhotoImage(image)
+        self.ui.canvas.create_image(0, 0, image=self.photo, anchor=tk.NW)
+        self.ui.canvas.image = self.photo
+
     def clear_canvas(self):
         """Clear the canvas."""
         self.ui.canvas.delete("all")
+        self.last_frame = None
+        self.last_source_frame = None
 
     def export_to_json(self):
-        """Export landmarks to JSON file."""
+        """Export landmarks to a JSON file in the background."""
         try:
             if not self.all_landmarks:
                 logging.info("No landmark data available to export.")
@@ -292,103 +349,274 @@ class LandmarkDetectorApp:
             filename = f"landmark_data_{now.strftime('%Y%m%d_%H%M%S')}.json"
             filepath = os.path.join(self.landmarks_dir, filename)
             
-            landmarks_data = {
-                "metadata": {
-                    "timestamp": now.isoformat(),
-                    "total_frames": self.frame_count,
-                    "capture_mode": "real-time" if self.realtime_capture else "single-frame",
-                    "mediapipe_version": mp.__version__,
-                    "application_version": "1.0.0",
-                    "face_mesh_config": {
-                        "static_image_mode": False,
-                        "max_num_faces": 5,
-                        "refine_landmarks": True,
-                        "min_detection_confidence": 0.5,
-                        "min_tracking_confidence": 0.5
-                    }
-                },
-                "frames": self.all_landmarks
-            }
-            
-            with open(filepath, 'w') as f:
-                json.dump(landmarks_data, f, indent=2)
-            
-            logging.info(f"Landmarks exported to {filepath}")
-            tk.messagebox.showinfo("Export", f"Landmarks exported to {filename}")
-            
-            if self.realtime_capture:
-                self.all_landmarks = []
+            metadata = build_metadata(self, now)
+
+            # The job takes ownership of a capture buffer; plain lists are copied so the
+            # Tk thread can keep replacing or extending its own landmarks during the export.
+            if isinstance(self.all_landmarks, LandmarkBuffer):
+                frames = self.all_landmarks
+                if self.realtime_capture:
+                    self._new_capture_buffer(discard=False)
+                else:
+                    self.all_landmarks = []
+            else:
+                frames = list(self.all_landmarks)
+                if self.realtime_capture:
+                    self._new_capture_buffer()
+
+            self._start_export(filepath, metadata, frames)
                 
         except Exception as e:
             error_msg = f"Error exporting landmarks: {str(e)}"
             logging.error(error_msg)
             tk.messagebox.showerror("Error", error_msg)
 
+    def _start_export(self, filepath, metadata, frames):
+        """Queue an export job and start reporting its progress."""
+        job = submit_export(filepath, metadata, frames, compress=self.ui.compress_export_var.get(),
+                            build_index=self.ui.build_index_var.get(), stream=self.ui.stream_export_var.get())
+        self.export_jobs.append(job)
+        logging.info(f"Export of {job.total} records to {job.filepath} started")
+        if len(self.export_jobs) == 1:
+            self._poll_export_jobs()
+
+    def queue_images(self, paths):
+        """Queue several images for background detection and show them in the gallery."""
+        if self.vid:
+            self.vid.release()
+            self.vid = None
+            self.clear_canvas()
+        if self.image_queue is None:
+            self.image_queue = ImageWorkQueue(self, self.ui.display_size())
+        results = self.image_queue.add(paths)
+        logging.info(f"Queued {len(paths)} images, {self.image_queue.pending()} waiting for detection")
+        if self.gallery is None or not self.gallery.top.winfo_exists():
+            self.gallery = GalleryWindow(self, self.image_queue)
+        self.gallery.add(results)
+        if self.gallery.selected is None:
+            self.gallery.select(results[0].path)
+
+    def show_gallery_image(self, result):
+        """Show a processed gallery image and make its landmarks the current export data."""
+        if self.vid:
+            self.vid.release()
+            self.vid = None
+        self.source_mode = "image"
+        self.image_path = None
+        self.last_source_frame = None
+        self.frame_size = result.frame_size
+        self._show_frame(result.preview)
+        self._release_capture_buffer()
+        self.all_landmarks = list(result.landmarks)
+
+    def export_gallery(self):
+        """Export the landmarks of every processed gallery image to one JSON file in the background."""
+        try:
+            frames = self.image_queue.export_records() if self.image_queue else []
+            if not frames:
+                tk.messagebox.showinfo("Export", "No processed gallery images with landmarks to export.")
+                return
+            now = datetime.datetime.now()
+            filepath = os.path.join(self.landmarks_dir, f"landmark_data_{now.strftime('%Y%m%d_%H%M%S')}_gallery.json")
+            images = [result.path for result in self.image_queue.results.values() if result.status == "done"]
+            metadata = build_metadata(self, now)
+            metadata.update({
+                "total_frames": len(images),
+                "capture_mode": "gallery",
+                "frame_size": None,
+                "image_sizes": {result.path: list(result.frame_size) for result in self.image_queue.results.values()
+                                if result.status == "done"},
+                "face_mesh_config": self.profile.face_mesh_config(static_image_mode=True),
+                "images": images,
+            })
+            self._start_export(filepath, metadata, frames)
+        except Exception as e:
+            logging.error(f"Error exporting gallery: {e}")
+            tk.messagebox.showerror("Error", f"Error exporting gallery: {str(e)}")
+
+    def _check_leftover_spill(self):
+        """Offer to delete the spill chunks of captures an earlier session never exported."""
+        if not os.path.isdir(self.spill_dir):
+            return
+        leftovers = []
+        for name in sorted(os.listdir(self.spill_dir)):
+            path = os.path.join(self.spill_dir, name)
+            if not os.path.isdir(path):
+                continue
+            if os.listdir(path):
+                leftovers.append(path)
+            else:
+                os.rmdir(path)
+        if not leftovers:
+            return
+
+        logging.warning(f"Found {len(leftovers)} unexported capture(s) from an earlier session in {self.spill_dir}")
+        if tk.messagebox.askyesno("Unexported landmarks",
+                                  f"{len(leftovers)} earlier capture(s) were never exported. Their records are kept "
+                                  f"as JSON Lines chunk files in {self.spill_dir}.\n\nDelete them?"):
+            for path in leftovers:
+                shutil.rmtree(path, ignore_errors=True)
+            logging.info(f"Removed {len(leftovers)} leftover capture spill directories")
+        else:
+            logging.info(f"Keeping leftover capture spill directories: {', '.join(leftovers)}")
+
+    def on_close(self):
+        """Offer to export an unexported capture, stop background work, close the landmark cache and close the window."""
+        if isinstance(self.all_landmarks, LandmarkBuffer) and self.all_landmarks:
+            export = tk.messagebox.askyesnocancel(
+                "Unexported landmarks", f"Export the {len(self.all_landmarks)} captured records before closing?")
+            if export is None:
+                return
+            if export:
+                self.export_to_json()
+            else:
+                self.all_landmarks.cleanup()
+        # Running exports are finished before the window goes away so their files are complete
+        for job in self.export_jobs:
+            job.future.result()
+        if self.image_queue is not None:
+            self.image_queue.close()
+        profiler.stop()
+        close_landmark_cache(self)
+        self.window.destroy()
+
+    def cancel_exports(self):
+        """Cancel all running and queued export jobs."""
+        for job in self.export_jobs:
+            job.cancel()
+
+    def _poll_export_jobs(self):
+        """Report progress of background exports in the UI until they have all finished."""
+        for job in [job for job in self.export_jobs if job.done]:
+            self.export_jobs.remove(job)
+            if job.status == "done":
+                tk.messagebox.showinfo("Export", f"Landmarks exported to {os.path.basename(job.filepath)}")
+            else:
+                self.unfinished_exports.append(job)
+                if job.status == "failed":
+                    tk.messagebox.showerror("Error", f"Error exporting landmarks: {job.error}")
+
+        if self.export_jobs:
+            job = self.export_jobs[0]
+            queued = f" (+{len(self.export_jobs) - 1} queued)" if len(self.export_jobs) > 1 else ""
+            self.ui.show_export_progress(job.progress, f"Exporting {job.written}/{job.total}{queued}")
+            self.window.after(100, self._poll_export_jobs)
+        else:
+            self.ui.show_export_progress(None)
+            # Restoring newest first keeps every capture ahead of the ones taken after it
+            for job in reversed(self.unfinished_exports):
+                self._restore_export_frames(job)
+            self.unfinished_exports = []
+
+    def _restore_export_frames(self, job):
+        """Hand the capture buffer of a cancelled or failed export back to the app, ahead of anything captured since."""
+        if not isinstance(job.frames, LandmarkBuffer) or not job.frames:
+            return
+        if isinstance(self.all_landmarks, LandmarkBuffer):
+            job.frames.extend(self.all_landmarks)
+            self.all_landmarks.cleanup()
+        self.all_landmarks = job.frames
+        logging.info(f"Restored {len(job.frames)} records from the unfinished export to {job.filepath}")
 
     def start_realtime_capture(self):
         """Start real-time landmark capture"""
         self.realtime_capture = True
         logging.info("Real-time landmark capture enabled")
-        self.all_landmarks = []
+        # A stopped capture that has not been exported yet is continued rather than replaced
+        if not isinstance(self.all_landmarks, LandmarkBuffer):
+            self._new_capture_buffer()
+
+    def _new_capture_buffer(self, discard=True):
+        """Replace the landmark store with an empty disk-spilling capture buffer."""
+        if discard and isinstance(self.all_landmarks, LandmarkBuffer):
+            self.all_landmarks.cleanup()
+        self.all_landmarks = LandmarkBuffer(self.spill_dir, self.capture_memory_limit_mb)
         
     def stop_realtime_capture(self):
         """Stop real-time landmark capture"""
         self.realtime_capture = False
         logging.info("Real-time landmark capture disabled")
+        if isinstance(self.all_landmarks, LandmarkBuffer):
+            if self.all_landmarks:
+                logging.info(f"Keeping {len(self.all_landmarks)} captured records until they are exported")
+            else:
+                self.all_landmarks.cleanup()
+                self.all_landmarks = []
+
+    def _release_capture_buffer(self):
+        """Export an unexported capture buffer, or remove an empty one, before all_landmarks is replaced."""
+        if isinstance(self.all_landmarks, LandmarkBuffer):
+            if self.all_landmarks:
+                self.export_to_json()
+            else:
+                self.all_landmarks.cleanup()
         
     def update(self):
-        """Update the frame for video display."""
+        """Present the next video frame when it is due on the source clock, dropping late frames."""
+        next_delay = self.delay
         try:
-            current_time = int(datetime.datetime.now().timestamp() * 1000)
-            
-            if current_time - self.last_frame_time >= self.delay:
-                if hasattr(self, 'vid') and self.vid and self.vid.isOpened() and self.playing:
-                    try:
-                        ret, frame = self.vid.read()
-                        if ret:
-                            frame, landmarks = process_video_frame(self, frame)
-                            if frame is not None:
-                                image = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-                                image = image.resize((self.ui.canvas_width, self.ui.canvas_height), Image.Resampling.LANCZOS)
-                                photo = ImageTk.PhotoImage(image)
-                                self.ui.canvas.create_image(0, 0, image=photo, anchor=tk.NW)
-                                self.ui.canvas.image = photo
-                                
-                                if self.realtime_capture:
-                                    if landmarks:
-                                        self.all_landmarks.extend(landmarks)
-                                else:
-                                    if landmarks:
-                                        self.all_landmarks = landmarks
-                                
-                                self.frame_count += 1
-                        else:
-                            logging.info(f"End of video reached. Processed {self.frame_count} frames.")
-                            self.vid.release()
-                            self.vid = None
-                            self.ui.canvas.delete("all")
-                            self.ui.btn_play_pause.config(state=tk.DISABLED)
+            if hasattr(self, 'vid') and self.vid and self.vid.isOpened() and self.playing:
+                try:
+                    wait_ms, late = self.scheduler.due(self.frame_count)
+                    if wait_ms:
+                        next_delay = wait_ms
+                        return
+                    # A piped source whose producer has stalled is polled again instead of blocking Tk
+                    if not self.vid.ready():
+                        next_delay = 10
+                        return
+
+                    # Real-time capture needs every frame, so it is paced but never dropped
+                    if late and not self.realtime_capture:
+                        dropped = 0
+                        while dropped < late and self.vid.ready() and self.vid.grab():
+                            dropped += 1
+                        self.frame_count += dropped
+                        self.scheduler.record_dropped(dropped)
+
+                    ret, frame = self.vid.read()
+                    if ret:
+                        frame, landmarks = process_video_frame(self, frame, self.ui.display_size())
+                        if frame is not None:
+                            self._show_frame(frame)
                             
-                            if len(self.all_landmarks) > 0:
-                                self.export_to_json()
+                            if self.realtime_capture:
+                                if landmarks:
+                                    self.all_landmarks.extend(landmarks)
+                            elif landmarks and not isinstance(self.all_landmarks, LandmarkBuffer):
+                                # A stopped capture stays the export data until it has been exported
+                                self.all_landmarks = landmarks
                             
-                            self.frame_count = 0
-                            return
-                    except Exception as e:
-                        logging.error(f"Error processing video frame: {e}")
-                        if self.vid:
-                            self.vid.release()
-                            self.vid = None
-                        self.ui.canvas.delete("all")
+                        self.frame_count += 1
+                        self.scheduler.record_presented()
+                        self.ui.playback_label.config(text=f"{self.scheduler.summary()}, {self.face_budget.summary()}, "
+                                                           f"{self.static_detector.summary()}")
+                        next_delay = self.scheduler.due(self.frame_count)[0] or 1
+                    else:
+                        logging.info(f"End of video reached. Processed {self.frame_count} frames. {self.scheduler.summary()}")
+                        self.vid.release()
+                        self.vid = None
+                        self.clear_canvas()
                         self.ui.btn_play_pause.config(state=tk.DISABLED)
-                        tk.messagebox.showerror("Error", f"Error processing video frame: {str(e)}")
+                        
+                        if len(self.all_landmarks) > 0:
+                            self.export_to_json()
+                        
+                        self.frame_count = 0
                         return
-                
-                self.last_frame_time = current_time
+                except Exception as e:
+                    logging.error(f"Error processing video frame: {e}")
+                    if self.vid:
+                        self.vid.release()
+                        self.vid = None
+                    self.clear_canvas()
+                    self.ui.btn_play_pause.config(state=tk.DISABLED)
+                    tk.messagebox.showerror("Error", f"Error processing video frame: {str(e)}")
+                    return
         except Exception as e:
             logging.error(f"Error in update loop: {e}")
         finally:
-            self.window.after(max(1, self.delay // 2), self.update)
+            self.window.after(next_delay, self.update)
 
 
     def toggle_play_pause(self):
@@ -400,17 +628,30 @@ class LandmarkDetectorApp:
         self.playing = not self.playing
         
         if self.playing:
+            self.scheduler.resync(self.frame_count)
             self.ui.btn_play_pause.config(text="Pause")
         else:
             self.ui.btn_play_pause.config(text="Play")
 
 if __name__ == "__main__":
+    import argparse
     from logger_setup import setup_logger
     logger = setup_logger(__name__)
+    parser = argparse.ArgumentParser(description="LanDetect - Landmark Detector")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default=DEFAULT_PROFILE,
+                        help="performance profile for FaceMesh, inference resolution and overlays")
+    parser.add_argument("--regions", type=parse_regions, default=None,
+                        help=f"comma-separated landmark regions to extract ({', '.join(REGIONS)}); default all")
+    parser.add_argument("--source", default=None,
+                        help='video file, directory of numbered images, or "-" for raw bgr24 frames on stdin')
+    parser.add_argument("--raw-size", type=parse_size, default=None, help="frame size of raw stdin frames, e.g. 1920x1080")
+    parser.add_argument("--fps", type=float, default=None, help="frame rate of image sequences and raw stdin frames")
+    args = parser.parse_args()
     try:
         window = tk.Tk()
         window.geometry("640x600")
-        app = LandmarkDetectorApp(window, "LanDetect - Landmark Detector")
+        app = LandmarkDetectorApp(window, "LanDetect - Landmark Detector", profile=args.profile, regions=args.regions,
+                                  source=args.source, source_fps=args.fps, raw_size=args.raw_size)
     except Exception as e:
         logger.exception("Error starting application")
         import traceback
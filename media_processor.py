@@ -3,273 +3,231 @@ import logging
 import cv2
 
 from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+from resolution_policy import VIDEO_POLICY, IMAGE_POLICY
+from image_processor import detect_landmarks_tiled, detect_multi_scale, needs_tiling, to_landmark_list
+from sampling_profiler import profiler
 from logger_setup import setup_logger
+from regions import region_connections
+from export_records import face_records
 from PIL import Image, ImageTk
 
 executor = ThreadPoolExecutor(max_workers=5)
 logger = setup_logger(__name__)
-frame_cache = {}
+FRAME_CACHE_SIZE = 32
+frame_cache = OrderedDict()
 
-def _process_video_frame_internal(app, frame):
-    """Internal helper to process a single video frame and return the processed frame and landmarks."""
-    try:
-        original_h, original_w = frame.shape[:2]
-        scale_factor = 1.0
-        if original_w < 640 or original_h < 480:
-            scale_factor = max(640 / original_w, 480 / original_h)
-            frame = cv2.resize(frame, None, fx=scale_factor, fy=scale_factor, interpolation=cv2.INTER_CUBIC)
+def _draw_face_overlays(app, frame, multi_face_landmarks):
+    """Draw the mesh and the selected regions of every face onto a copy of frame and blend it in.
+
+    Colors are BGR: blue mesh and regions, green face oval.
+    """
+    region_spec = app.mp_drawing.DrawingSpec(
+        color=(255, 0, 0),
+        thickness=1,
+        circle_radius=0
+    )
+    face_spec = app.mp_drawing.DrawingSpec(
+        color=(0, 255, 0),
+        thickness=1,
+        circle_radius=0
+    )
+    mesh_spec = app.mp_drawing.DrawingSpec(
+        color=(255, 0, 0),
+        thickness=1,
+        circle_radius=0
+    )
+    
+    overlay = frame.copy()
+    
+    for face_landmarks in multi_face_landmarks:
+        if app.profile.overlay == "full" and not app.regions:
+            app.mp_drawing.draw_landmarks(
+                image=overlay,
+                landmark_list=face_landmarks,
+                connections=app.mp_face_mesh.FACEMESH_TESSELATION,
+                landmark_drawing_spec=None,
+                connection_drawing_spec=mesh_spec
+            )
+        for region, connections in region_connections(app.regions):
+            app.mp_drawing.draw_landmarks(
+                image=overlay,
+                landmark_list=face_landmarks,
+                connections=connections,
+                landmark_drawing_spec=None,
+                connection_drawing_spec=face_spec if region == "face_oval" else region_spec
+            )
+    
+    alpha = 0.4
+    return cv2.addWeighted(overlay, alpha, frame, 1 - alpha, 0)
+
+def _frame_records(app, multi_face_landmarks, width, height):
+    """Return the export records of every face detected on the current frame."""
+    return face_records(multi_face_landmarks, width, height, app.regions, frame=app.frame_count)
+
+def detect_video_landmarks(app, frame):
+    """Run the video FaceMesh on a BGR frame without drawing. Returns the face landmark lists and export records.
+
+    Frames already in app.landmark_cache are served from it without inference. Frames that are unchanged
+    since the last inferred frame reuse its landmarks; their records carry "static_skip": True and they
+    are not written to the cache, so a cached clip does not depend on the static threshold.
+    """
+    original_h, original_w = frame.shape[:2]
+    app.frame_size = (original_w, original_h)
+    cache = getattr(app, 'landmark_cache', None)
+
+    signature = app.static_detector.signature(frame)
+    stored = cache.get(app.frame_count) if cache is not None else None
+    if stored is not None:
+        frame_landmarks = _frame_records(app, stored, original_w, original_h)
+        app.static_detector.store(signature, (stored, frame_landmarks))
+        return stored, frame_landmarks
+
+    cached = app.static_detector.lookup(signature)
+    if cached is not None:
+        multi_face_landmarks, records = cached
+        return multi_face_landmarks, [{**record, "frame": app.frame_count, "static_skip": True} for record in records]
+
+    policy = getattr(app, 'resolution_policy', VIDEO_POLICY)
+    decision = policy.choose(original_w, original_h, label=getattr(app, 'video_path', None))
+    rgb_image = cv2.cvtColor(policy.resize(frame, decision), cv2.COLOR_BGR2RGB)
+
+    results = app.face_budget.model(app.face_mesh_video).process(rgb_image)
+    multi_face_landmarks = results.multi_face_landmarks if results and results.multi_face_landmarks else []
+    app.face_budget.observe(len(multi_face_landmarks))
 
-        rgb_image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    frame_landmarks = _frame_records(app, multi_face_landmarks, original_w, original_h)
+    app.static_detector.store(signature, (multi_face_landmarks, frame_landmarks))
+    if cache is not None:
+        cache.put(app.frame_count, multi_face_landmarks)
+    return multi_face_landmarks, frame_landmarks
+
+def _process_video_frame_internal(app, frame, display_size=None):
+    """Internal helper to process a single video frame and return the processed frame, landmarks and face lists.
+
+    With display_size the frame is reduced to that size before the overlays are drawn, so only the
+    pixels that are shown get annotated.
+    """
+    try:
         frame_landmarks = []
+        multi_face_landmarks = []
         
         try:
-            results = app.face_mesh_video.process(rgb_image)
-            
-            if results and results.multi_face_landmarks:
-                lips_spec = app.mp_drawing.DrawingSpec(
-                    color=(255, 0, 0),
-                    thickness=1,
-                    circle_radius=0
-                )
-                eyes_spec = app.mp_drawing.DrawingSpec(
-                    color=(255, 0, 0),
-                    thickness=1,
-                    circle_radius=0
-                )
-                face_spec = app.mp_drawing.DrawingSpec(
-                    color=(0, 255, 0),
-                    thickness=1,
-                    circle_radius=0
-                )
-                mesh_spec = app.mp_drawing.DrawingSpec(
-                    color=(255, 0, 0),
-                    thickness=1,
-                    circle_radius=0
-                )
-                
-                overlay = frame.copy()
-                
-                for face_landmarks in results.multi_face_landmarks:
-                    app.mp_drawing.draw_landmarks(
-                        image=overlay,
-                        landmark_list=face_landmarks,
-                        connections=app.mp_face_mesh.FACEMESH_LIPS,
-                        landmark_drawing_spec=None,
-                        connection_drawing_spec=lips_spec
-                    )
-                    app.mp_drawing.draw_landmarks(
-                        image=overlay,
-                        landmark_list=face_landmarks,
-                        connections=app.mp_face_mesh.FACEMESH_TESSELATION,
-                        landmark_drawing_spec=None,
-                        connection_drawing_spec=mesh_spec
-                    )
-                    app.mp_drawing.draw_landmarks(
-                        image=overlay,
-                        landmark_list=face_landmarks,
-                        connections=app.mp_face_mesh.FACEMESH_LEFT_EYE,
-                        landmark_drawing_spec=None,
-                        connection_drawing_spec=eyes_spec
-                    )
-                    app.mp_drawing.draw_landmarks(
-                        image=overlay,
-                        landmark_list=face_landmarks,
-                        connections=app.mp_face_mesh.FACEMESH_RIGHT_EYE,
-                        landmark_drawing_spec=None,
-                        connection_drawing_spec=eyes_spec
-                    )
-                    app.mp_drawing.draw_landmarks(
-                        image=overlay,
-                        landmark_list=face_landmarks,
-                        connections=app.mp_face_mesh.FACEMESH_LEFT_EYEBROW,
-                        landmark_drawing_spec=None,
-                        connection_drawing_spec=eyes_spec
-                    )
-                    app.mp_drawing.draw_landmarks(
-                        image=overlay,
-                        landmark_list=face_landmarks,
-                        connections=app.mp_face_mesh.FACEMESH_RIGHT_EYEBROW,
-                        landmark_drawing_spec=None,
-                        connection_drawing_spec=eyes_spec
-                    )
-                    
-                    app.mp_drawing.draw_landmarks(
-                        image=overlay,
-                        landmark_list=face_landmarks,
-                        connections=app.mp_face_mesh.FACEMESH_FACE_OVAL,
-                        landmark_drawing_spec=None,
-                        connection_drawing_spec=face_spec
-                    )
-                
-                alpha = 0.4
-                frame = cv2.addWeighted(overlay, alpha, frame, 1 - alpha, 0)
-                
-                for face_idx, face_landmarks in enumerate(results.multi_face_landmarks):
-                    face_data = {
-                        "frame": app.frame_count,
-                        "face_index": face_idx,
-                        "landmarks": []
-                    }
-                    
-                    for idx, landmark in enumerate(face_landmarks.landmark):
-                        x = landmark.x * frame.shape[1]
-                        y = landmark.y * frame.shape[0]
-                        if scale_factor > 1.0:
-                            x = round(x / scale_factor, 2)
-                            y = round(y / scale_factor, 2)
-                        else:
-                            x = round(x, 2)
-                            y = round(y, 2)
-                        z = round(landmark.z, 3)
-                        
-                        face_data["landmarks"].append({
-                            "id": idx,
-                            "position": {
-                                "x": x,
-                                "y": y,
-                                "z": z
-                            }
-                        })
-                    
-                    frame_landmarks.append(face_data)
-            
+            multi_face_landmarks, frame_landmarks = detect_video_landmarks(app, frame)
         except Exception as e:
             logging.error(f"Error processing landmarks: {e}")
-        
-        if scale_factor > 1.0:
-            frame = cv2.resize(frame, (original_w, original_h), interpolation=cv2.INTER_AREA)
+
+        if display_size is not None and (frame.shape[1], frame.shape[0]) != tuple(display_size):
+            frame = cv2.resize(frame, tuple(display_size), interpolation=cv2.INTER_AREA)
+        if multi_face_landmarks:
+            frame = _draw_face_overlays(app, frame, multi_face_landmarks)
             
-        return frame, frame_landmarks
+        return frame, frame_landmarks, multi_face_landmarks
             
     except Exception as e:
         logging.error(f"Error in _process_video_frame_internal: {e}")
-        return None, []
+        return None, [], []
+
+def clear_frame_cache():
+    """Drop the cached processed frames; their overlays and records depend on the profile and regions."""
+    frame_cache.clear()
 
-def process_video_frame(app, frame):
-    """Process a single video frame using caching and multi-threading. Returns the processed frame and landmarks."""
-    key = (id(app.vid), app.frame_count)
+def process_video_frame(app, frame, display_size=None):
+    """Process a single video frame using caching and multi-threading. Returns the processed frame and landmarks.
+
+    With display_size (width, height) the returned frame is a preview annotated at that size; the source
+    frame and its faces are kept on app for annotate_full_resolution.
+    """
+    key = (id(app.vid), app.frame_count, display_size)
     global frame_cache, executor
     if key in frame_cache:
         future = frame_cache[key]
     else:
-        future = executor.submit(_process_video_frame_internal, app, frame)
+        future = executor.submit(_process_video_frame_internal, app, frame, display_size)
         frame_cache[key] = future
-    return future.result()
+        while len(frame_cache) > FRAME_CACHE_SIZE:
+            frame_cache.popitem(last=False)
+    processed, frame_landmarks, multi_face_landmarks = future.result()
+    app.last_source_frame = frame
+    app.last_face_landmarks = multi_face_landmarks
+    app.last_hand_landmarks = None
+    profiler.frame_done()
+    return processed, frame_landmarks
+
+def annotate_full_resolution(app):
+    """Return the last source frame with overlays drawn at full resolution, or None without one."""
+    frame = getattr(app, 'last_source_frame', None)
+    if frame is None:
+        return None
+    return annotate_frame(app, frame, getattr(app, 'last_face_landmarks', None), getattr(app, 'last_hand_landmarks', None))
+
+def _draw_hand_overlays(app, frame, multi_hand_landmarks):
+    """Draw the landmarks and connections of every hand onto frame in place."""
+    hand_landmark_style = app.mp_drawing.DrawingSpec(
+        color=(20, 80, 255),  # Deep blue for landmarks
+        thickness=2,          # Thinner points
+        circle_radius=1       # Smaller circles
+    )
+    hand_connection_style = app.mp_drawing.DrawingSpec(
+        color=(50, 50, 50),   # Dark gray for connections
+        thickness=1           # Thinner lines
+    )
+    for hand_landmarks in multi_hand_landmarks:
+        app.mp_drawing.draw_landmarks(
+            frame,
+            hand_landmarks,
+            app.mp_hands.HAND_CONNECTIONS,
+            landmark_drawing_spec=hand_landmark_style,
+            connection_drawing_spec=hand_connection_style
+        )
+    return frame
+
+def annotate_frame(app, frame, multi_face_landmarks, multi_hand_landmarks=None):
+    """Return a copy of frame with face and hand overlays; landmarks are normalized, so any frame size works."""
+    frame = _draw_face_overlays(app, frame, multi_face_landmarks) if multi_face_landmarks else frame.copy()
+    if multi_hand_landmarks:
+        _draw_hand_overlays(app, frame, multi_hand_landmarks)
+    return frame
 
-def detect_landmarks_on_image(app, frame):
-    """Detect landmarks on a single image."""
+def detect_image_faces(app, frame, face_mesh=None):
+    """Run the image FaceMesh at each of the profile's scales on a BGR image resized by the image policy.
+
+    Images of TILED_MIN_PIXELS or more are detected in overlapping full-resolution tiles instead, with
+    the profile's FaceMesh settings, so small faces in large group photos are not lost to downscaling.
+    Returns the face landmark lists and export records in source pixel coordinates.
+    """
+    height, width = frame.shape[:2]
+    if needs_tiling(width, height):
+        faces = detect_landmarks_tiled(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB), app.profile)
+        multi_face_landmarks = [to_landmark_list(points, width, height) for points in faces]
+    else:
+        policy = getattr(app, 'image_resolution_policy', IMAGE_POLICY)
+        decision = policy.choose(width, height)
+        rgb_image = cv2.cvtColor(policy.resize(frame, decision), cv2.COLOR_BGR2RGB)
+        results, _, _ = detect_multi_scale(face_mesh or app.face_mesh_image, rgb_image, app.profile.scales)
+        multi_face_landmarks = results.multi_face_landmarks if results and results.multi_face_landmarks else []
+    return multi_face_landmarks, face_records(multi_face_landmarks, width, height, app.regions)
+
+def detect_landmarks_on_image(app, frame, face_mesh=None, display=None):
+    """Detect landmarks on a single image, with app.face_mesh_image unless another FaceMesh is given.
+
+    Overlays are drawn on display, a preview of frame, when one is given and on frame otherwise; the
+    export records are always in frame pixel coordinates. app is only read, so this is safe to call
+    from image queue workers.
+    """
     try:
-        rgb_image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        target = display if display is not None else frame
         frame_landmarks = []
         
         try:
-            results = app.face_mesh_image.process(rgb_image)
-            
-            if results and results.multi_face_landmarks:
-                lips_spec = app.mp_drawing.DrawingSpec(
-                    color=(255, 0, 0),
-                    thickness=1,
-                    circle_radius=0
-                )
-                eyes_spec = app.mp_drawing.DrawingSpec(
-                    color=(255, 0, 0),
-                    thickness=1,
-                    circle_radius=0
-                )
-                face_spec = app.mp_drawing.DrawingSpec(
-                    color=(0, 255, 0),
-                    thickness=1,
-                    circle_radius=0
-                )
-                mesh_spec = app.mp_drawing.DrawingSpec(
-                    color=(255, 0, 0),
-                    thickness=1,
-                    circle_radius=0
-                )
-                
-                overlay = frame.copy()
-                
-                for face_landmarks in results.multi_face_landmarks:
-                    app.mp_drawing.draw_landmarks(
-                        image=overlay,
-                        landmark_list=face_landmarks,
-                        connections=app.mp_face_mesh.FACEMESH_LIPS,
-                        landmark_drawing_spec=None,
-                        connection_drawing_spec=lips_spec
-                    )
-                    app.mp_drawing.draw_landmarks(
-                        image=overlay,
-                        landmark_list=face_landmarks,
-                        connections=app.mp_face_mesh.FACEMESH_TESSELATION,
-                        landmark_drawing_spec=None,
-                        connection_drawing_spec=mesh_spec
-                    )
-                    app.mp_drawing.draw_landmarks(
-                        image=overlay,
-                        landmark_list=face_landmarks,
-                        connections=app.mp_face_mesh.FACEMESH_LEFT_EYE,
-                        landmark_drawing_spec=None,
-                        connection_drawing_spec=eyes_spec
-                    )
-                    app.mp_drawing.draw_landmarks(
-                        image=overlay,
-                        landmark_list=face_landmarks,
-                        connections=app.mp_face_mesh.FACEMESH_RIGHT_EYE,
-                        landmark_drawing_spec=None,
-                        connection_drawing_spec=eyes_spec
-                    )
-                    app.mp_drawing.draw_landmarks(
-                        image=overlay,
-                        landmark_list=face_landmarks,
-                        connections=app.mp_face_mesh.FACEMESH_LEFT_EYEBROW,
-                        landmark_drawing_spec=None,
-                        connection_drawing_spec=eyes_spec
-                    )
-                    app.mp_drawing.draw_landmarks(
-                        image=overlay,
-                        landmark_list=face_landmarks,
-                        connections=app.mp_face_mesh.FACEMESH_RIGHT_EYEBROW,
-                        landmark_drawing_spec=None,
-                        connection_drawing_spec=eyes_spec
-                    )
-                    
-                    app.mp_drawing.draw_landmarks(
-                        image=overlay,
-                        landmark_list=face_landmarks,
-                        connections=app.mp_face_mesh.FACEMESH_FACE_OVAL,
-                        landmark_drawing_spec=None,
-                        connection_drawing_spec=face_spec
-                    )
-                
-                alpha = 0.4
-                frame = cv2.addWeighted(overlay, alpha, frame, 1 - alpha, 0)
-                
-                for face_idx, face_landmarks in enumerate(results.multi_face_landmarks):
-                    face_data = {
-                        "face_index": face_idx,
-                        "landmarks": []
-                    }
-                    
-                    for idx, landmark in enumerate(face_landmarks.landmark):
-                        x = round(landmark.x * frame.shape[1], 2)
-                        y = round(landmark.y * frame.shape[0], 2)
-                        z = round(landmark.z, 3)
-                        
-                        face_data["landmarks"].append({
-                            "id": idx,
-                            "position": {
-                                "x": x,
-                                "y": y,
-                                "z": z
-                            }
-                        })
-                    
-                    frame_landmarks.append(face_data)
+            multi_face_landmarks, frame_landmarks = detect_image_faces(app, frame, face_mesh)
+            if multi_face_landmarks:
+                target = _draw_face_overlays(app, target, multi_face_landmarks)
             
         except Exception as e:
             logging.error(f"Error processing landmarks on image: {e}")
         
-        return frame, frame_landmarks
+        return target, frame_landmarks
             
     except Exception as e:
         logging.error(f"Error in detect_landmarks_on_image: {e}")
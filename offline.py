@@ -0,0 +1,187 @@
+"""Offline processing of a whole video without the GUI.
+
+Runs FaceMesh over every frame, exports the landmarks as JSON and optionally writes an annotated
+copy of the video. Frames come from a video file, a directory of numbered images or raw frames on
+stdin. Overlay drawing runs as a separate stage in a process pool so inference is never
+stalled by rendering:
+
+    python offline.py input.mp4 --annotated annotated.mp4 --render-workers 4
+    ffmpeg -i input.mkv -f rawvideo -pix_fmt bgr24 - | python offline.py - --raw-size 1920x1080 --fps 25
+
+Detection itself can be spread over processes for a single long clip with --inference-workers.
+Long runs save a checkpoint every --checkpoint-every frames; after a crash, run the same command
+with --resume to continue from it.
+"""
+import argparse
+import datetime
+import logging
+import numpy as np
+import time
+import sys
+import cv2
+import os
+
+from media_processor import detect_video_landmarks
+from parallel_inference import InferencePool
+from export_records import face_records
+from frame_sources import open_source, parse_size
+from landmark_cache import open_landmark_cache
+from checkpoint import Checkpoint, CHECKPOINT_EVERY, seek_source
+from sampling_profiler import profiler
+from overlay_renderer import OverlayRenderPool, overlay_groups, landmark_array
+from export_jobs import ExportJob, build_metadata
+from profiles import PROFILES, DEFAULT_PROFILE
+from landmark_buffer import LandmarkBuffer
+from logger_setup import setup_logger
+from frame_diff import DEFAULT_STATIC_THRESHOLD
+from regions import parse_regions
+from headless import HeadlessApp
+
+logger = setup_logger(__name__)
+
+def process_video(app, input_path, annotated_path=None, render_workers=None, fps=None, raw_size=None,
+                  inference_workers=None, checkpoint=None, resume=False):
+    """Detect landmarks on every frame of input_path into app.all_landmarks, optionally writing an annotated video.
+
+    input_path is anything open_source accepts: a video file, a directory of numbered images or "-".
+    With inference_workers, frames are decoded once here and detected in that many processes over
+    shared memory, using static-mode FaceMesh; results are still collected in frame order.
+    With a Checkpoint the records are saved periodically, and resume continues from the last save.
+    """
+    app.video_path = input_path
+    app.inference_workers = inference_workers
+    app.vid = open_source(input_path, fps=fps, raw_size=raw_size)
+    if not inference_workers:
+        open_landmark_cache(app, app.vid)
+    width, height, fps = app.vid.width, app.vid.height, app.vid.fps
+    total_frames = app.vid.frame_count or "?"
+    app.frame_size = (width, height)
+    logger.info(f"Processing {input_path}: {app.vid.describe()}")
+
+    start_frame = 0
+    if resume and not app.vid.seekable:
+        raise IOError(f"Cannot resume {input_path}: the source is not seekable, so it cannot be matched to a checkpoint")
+    if checkpoint is not None:
+        start_frame = checkpoint.resume(app) if resume else 0
+        if not start_frame:
+            checkpoint.start()
+        elif not seek_source(app.vid, start_frame):
+            raise IOError(f"Cannot resume {input_path} at frame {start_frame}")
+        app.frame_count = start_frame
+
+    writer = None
+    renderer = None
+    if annotated_path:
+        writer = cv2.VideoWriter(annotated_path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+        renderer = OverlayRenderPool((height, width, 3), overlay_groups(app), writer.write,
+                                     workers=render_workers, max_faces=app.profile.max_num_faces)
+
+    detector = None
+    if inference_workers:
+        scale = np.array((width, height), dtype=np.float32)
+
+        def handle_result(frame, frame_index, faces):
+            records = face_records(faces, width, height, app.regions, frame=frame_index)
+            app.all_landmarks.extend(records)
+            if checkpoint is not None:
+                checkpoint.add(frame_index, records, app)
+            if renderer is not None:
+                renderer.submit(frame, [points[:, :2] * scale for points in faces])
+
+        detector = InferencePool((height, width, 3), app.profile.name, handle_result, workers=inference_workers)
+
+    start = time.perf_counter()
+    try:
+        while True:
+            ret, frame = app.vid.read()
+            if not ret:
+                break
+            if detector is not None:
+                detector.submit(frame, app.frame_count)
+            else:
+                multi_face_landmarks, records = detect_video_landmarks(app, frame)
+                app.all_landmarks.extend(records)
+                if checkpoint is not None:
+                    checkpoint.add(app.frame_count, records, app)
+                if renderer is not None:
+                    renderer.submit(frame, [landmark_array(face, width, height) for face in multi_face_landmarks])
+            app.frame_count += 1
+            profiler.frame_done()
+            if app.frame_count % 500 == 0:
+                logger.info(f"Processed {app.frame_count}/{total_frames} frames")
+    finally:
+        if detector is not None:
+            detector.close()
+        if renderer is not None:
+            renderer.close()
+        if writer is not None:
+            writer.release()
+        app.vid.release()
+        app.vid = None
+
+    elapsed = time.perf_counter() - start
+    summary = f"{inference_workers} inference processes" if detector is not None else app.static_detector.summary()
+    if app.landmark_cache is not None:
+        summary += f", {app.landmark_cache.hits} frames served from the landmark cache"
+    processed = app.frame_count - start_frame
+    logger.info(f"Processed {processed} frames in {elapsed:.1f}s ({processed / max(elapsed, 1e-9):.1f} FPS), "
+                f"{summary}")
+    if annotated_path:
+        logger.info(f"Annotated video written to {annotated_path}")
+
+def export_landmarks(app, compress=False, build_index=False, stream=False):
+    """Export app.all_landmarks to the landmarks directory and return the export job."""
+    now = datetime.datetime.now()
+    filepath = os.path.join(app.landmarks_dir, f"landmark_data_{now.strftime('%Y%m%d_%H%M%S')}.json")
+    job = ExportJob(filepath, build_metadata(app, now), app.all_landmarks, compress, build_index, stream)
+    job.run()
+    return job
+
+def main():
+    parser = argparse.ArgumentParser(description="Process a video offline and export its landmarks.")
+    parser.add_argument("video", help='input video file, directory of numbered images, or "-" for raw bgr24 frames on stdin')
+    parser.add_argument("--raw-size", type=parse_size, default=None, help="frame size of raw stdin frames, e.g. 1920x1080")
+    parser.add_argument("--fps", type=float, default=None, help="frame rate of image sequences and raw stdin frames")
+    parser.add_argument("--annotated", help="write a video with landmark overlays to this path")
+    parser.add_argument("--render-workers", type=int, default=None, help="overlay rendering processes (default: CPU count)")
+    parser.add_argument("--inference-workers", type=int, default=None,
+                        help="detect in this many processes over shared memory (static-mode FaceMesh)")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default=DEFAULT_PROFILE, help="performance profile")
+    parser.add_argument("--static-threshold", type=float, default=DEFAULT_STATIC_THRESHOLD,
+                        help="mean 64x36 grayscale difference below which a frame reuses the last landmarks (0 disables)")
+    parser.add_argument("--regions", type=parse_regions, default=None, help="comma-separated landmark regions to extract")
+    parser.add_argument("--landmarks-dir", default="landmarks", help="directory for the JSON export")
+    parser.add_argument("--compress", action="store_true", help="write the export as .json.gz")
+    parser.add_argument("--index", action="store_true", help="also write a sidecar query index")
+    parser.add_argument("--stream", action="store_true", help="write a delta-encoded .lmks landmark stream instead of JSON")
+    parser.add_argument("--checkpoint-every", type=int, default=CHECKPOINT_EVERY,
+                        help="save a resumable checkpoint every this many frames (0 disables)")
+    parser.add_argument("--resume", action="store_true", help="continue from the last checkpoint of the same run")
+    parser.add_argument("--sample-frames", type=int, default=0,
+                        help="profile the first this many frames with the sampling profiler (collapsed stacks in logs/)")
+    args = parser.parse_args()
+    if args.resume and args.annotated:
+        parser.error("--resume cannot be combined with --annotated; the annotated video must be written in one run")
+    if args.resume and args.video == "-":
+        parser.error("--resume needs a seekable input; frames piped on stdin cannot be matched to a checkpoint")
+    logging.getLogger().setLevel(logging.INFO)
+
+    app = HeadlessApp(landmarks_dir=args.landmarks_dir, profile=args.profile, regions=args.regions,
+                      static_threshold=args.static_threshold)
+    app.all_landmarks = LandmarkBuffer(os.path.join(app.landmarks_dir, ".spill"))
+    checkpoint = Checkpoint.for_run(app, args.video, args.checkpoint_every, args.inference_workers) if args.checkpoint_every else None
+    if args.sample_frames:
+        profiler.start(args.sample_frames)
+    try:
+        process_video(app, args.video, args.annotated, args.render_workers, args.fps, args.raw_size,
+                      args.inference_workers, checkpoint, args.resume)
+        job = export_landmarks(app, args.compress, args.index, args.stream)
+        if checkpoint is not None and job.status == "done":
+            checkpoint.discard()
+    finally:
+        profiler.stop()
+        app.close()
+    sys.exit(0 if job.status == "done" else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import mediapipe as mp
+import numpy as np
+import cv2
+
+from slot_pool import SlotPool, attach_slot
+from regions import region_connections
+
+OVERLAY_ALPHA = 0.4
+
+def overlay_groups(app):
+    """Return the (connections, BGR color) groups drawn for the app's profile and regions.
+
+    Matches the on-screen overlay from media_processor: blue mesh and regions, green face oval (colors are BGR).
+    """
+    groups = []
+    if app.profile.overlay == "full" and not app.regions:
+        groups.append((np.array(sorted(mp.solutions.face_mesh.FACEMESH_TESSELATION), dtype=np.int32), (255, 0, 0)))
+    for name, connections in region_connections(app.regions):
+        color = (0, 255, 0) if name == "face_oval" else (255, 0, 0)
+        groups.append((np.array(sorted(connections), dtype=np.int32), color))
+    return groups
+
+def landmark_array(face_landmarks, width, height):
+    """Convert a FaceMesh landmark list to a (N, 2) float32 array of pixel coordinates."""
+    return np.array([(lm.x * width, lm.y * height) for lm in face_landmarks.landmark], dtype=np.float32)
+
+def render_overlay(frame, faces, groups, alpha=OVERLAY_ALPHA):
+    """Draw the connection groups of every face and blend them into frame in place."""
+    if not len(faces):
+        return frame
+    overlay = frame.copy()
+    for points in faces:
+        pixels = points.astype(np.int32)
+        for connections, color in groups:
+            connections = connections[(connections < len(pixels)).all(axis=1)]
+            cv2.polylines(overlay, pixels[connections], False, color, 1)
+    cv2.addWeighted(overlay, alpha, frame, 1 - alpha, 0, dst=frame)
+    return frame
+
+_worker_groups = None
+
+def _init_worker(groups):
+    global _worker_groups
+    _worker_groups = groups
+
+def _render_slot(name, shape, face_count, landmark_count):
+    """Render the frame and landmarks held in shared memory slot name, writing the result back in place."""
+    shm = attach_slot(name)
+    frame = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+    faces = np.ndarray((face_count, landmark_count, 2), dtype=np.float32, buffer=shm.buf, offset=frame.nbytes)
+    render_overlay(frame, faces, _worker_groups)
+
+class OverlayRenderPool(SlotPool):
+    """Renders overlays in worker processes and hands annotated frames back in submission order.
+
+    Each in-flight frame occupies a shared memory slot holding the pixels followed by the face landmark
+    arrays, so only slot names and sizes are pickled. Workers draw into the slot in place; on_frame is
+    called with a view of the slot, in order, before the slot is reused.
+    """
+    def __init__(self, frame_shape, groups, on_frame, workers=None, slots=None, max_faces=5, landmark_count=478):
+        self.frame_shape = tuple(frame_shape)
+        self.frame_bytes = int(np.prod(self.frame_shape))
+        self.max_faces = max_faces
+        self.on_frame = on_frame
+        slot_size = self.frame_bytes + max_faces * landmark_count * 2 * 4
+        super().__init__(slot_size, _init_worker, (groups,), workers, slots)
+
+    def submit(self, frame, faces):
+        """Queue frame with its (N, 2) landmark arrays for rendering; blocks only when every slot is busy."""
+        index, shm = self._acquire()
+        faces = faces[:self.max_faces]
+        landmark_count = len(faces[0]) if faces else 0
+        np.ndarray(self.frame_shape, dtype=np.uint8, buffer=shm.buf)[:] = frame
+        if faces:
+            target = np.ndarray((len(faces), landmark_count, 2), dtype=np.float32, buffer=shm.buf, offset=self.frame_bytes)
+            target[:] = np.stack(faces)
+            del target
+        self._dispatch(index, _render_slot, self.frame_shape, len(faces), landmark_count)
+
+    def _deliver(self, shm, result, context):
+        frame = np.ndarray(self.frame_shape, dtype=np.uint8, buffer=shm.buf)
+        try:
+            self.on_frame(frame)
+        finally:
+            del frame
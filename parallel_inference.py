@@ -0,0 +1,50 @@
+import numpy as np
+import cv2
+
+from slot_pool import SlotPool, attach_slot
+from profiles import PROFILES
+
+_worker_face_mesh = None
+_worker_policy = None
+
+def _init_worker(profile_name):
+    global _worker_face_mesh, _worker_policy
+    profile = PROFILES[profile_name]
+    _worker_face_mesh = profile.create_face_mesh(static_image_mode=True)
+    _worker_policy = profile.video_policy()
+
+def _detect_slot(name, shape):
+    """Run FaceMesh on the frame held in shared memory slot name. Returns (N, 3) normalized landmark arrays."""
+    frame = np.ndarray(shape, dtype=np.uint8, buffer=attach_slot(name).buf)
+    decision = _worker_policy.choose(shape[1], shape[0])
+    rgb_image = cv2.cvtColor(_worker_policy.resize(frame, decision), cv2.COLOR_BGR2RGB)
+    del frame
+    results = _worker_face_mesh.process(rgb_image)
+    faces = results.multi_face_landmarks if results and results.multi_face_landmarks else []
+    return [np.array([(lm.x, lm.y, lm.z) for lm in face.landmark], dtype=np.float32) for face in faces]
+
+class InferencePool(SlotPool):
+    """Runs FaceMesh on video frames in worker processes and hands results back in frame order.
+
+    Frames are copied once into shared memory slots, so only slot names are pickled; each worker owns a
+    static-mode FaceMesh for the profile since tracking state cannot span processes. on_result is called
+    in submission order with a view of the frame slot, its frame index and the face landmark arrays,
+    before the slot is reused.
+    """
+    def __init__(self, frame_shape, profile_name, on_result, workers=None, slots=None):
+        self.frame_shape = tuple(frame_shape)
+        self.on_result = on_result
+        super().__init__(int(np.prod(self.frame_shape)), _init_worker, (profile_name,), workers, slots)
+
+    def submit(self, frame, frame_index):
+        """Queue frame for detection; blocks only when every slot is busy."""
+        index, shm = self._acquire()
+        np.ndarray(self.frame_shape, dtype=np.uint8, buffer=shm.buf)[:] = frame
+        self._dispatch(index, _detect_slot, self.frame_shape, context=frame_index)
+
+    def _deliver(self, shm, faces, frame_index):
+        frame = np.ndarray(self.frame_shape, dtype=np.uint8, buffer=shm.buf)
+        try:
+            self.on_result(frame, frame_index, faces)
+        finally:
+            del frame
@@ -0,0 +1,65 @@
+import logging
+import time
+
+DEFAULT_FPS = 30.0
+
+class PlaybackScheduler:
+    """Paces video presentation to the source frame rate.
+
+    Frame n of the source is due at start_time + (n - start_position) / fps. The caller asks when the next
+    frame is due and how many frames it has fallen behind, drops late frames to catch up, and records
+    presented and dropped frames so achieved versus target FPS can be reported.
+    """
+    def __init__(self, fps=DEFAULT_FPS, report_interval=5.0):
+        self.report_interval = report_interval
+        self.reset(fps)
+
+    def reset(self, fps, position=0):
+        """Restart the clock for a (new) video at the given source position."""
+        self.fps = fps if fps and fps > 0 else DEFAULT_FPS
+        self.presented = 0
+        self.dropped = 0
+        self.window_start = time.perf_counter()
+        self.window_presented = 0
+        self.achieved_fps = 0.0
+        self.last_report = self.window_start
+        self.resync(position)
+
+    def resync(self, position):
+        """Anchor the clock so that the frame at position is due now, e.g. after a pause or seek."""
+        self.start_time = time.perf_counter()
+        self.start_position = position
+
+    def due(self, position):
+        """Return (wait_ms, late_frames) for the frame at position.
+
+        wait_ms is how long until that frame is due (0 when due or overdue); late_frames is how many
+        frames after it are already overdue as well and should be dropped to stay in sync.
+        """
+        elapsed = time.perf_counter() - self.start_time
+        due_position = self.start_position + int(elapsed * self.fps)
+        if position > due_position:
+            next_due = self.start_time + (position - self.start_position) / self.fps
+            return max(1, int((next_due - time.perf_counter()) * 1000)), 0
+        return 0, due_position - position
+
+    def record_presented(self):
+        """Count a presented frame and update the achieved FPS once per second."""
+        self.presented += 1
+        self.window_presented += 1
+        now = time.perf_counter()
+        if now - self.window_start >= 1.0:
+            self.achieved_fps = self.window_presented / (now - self.window_start)
+            self.window_start = now
+            self.window_presented = 0
+        if now - self.last_report >= self.report_interval:
+            self.last_report = now
+            logging.info(self.summary())
+
+    def record_dropped(self, count):
+        """Count frames skipped to catch up with the source clock."""
+        self.dropped += count
+
+    def summary(self):
+        """Return a one-line description of achieved versus target FPS and dropped frames."""
+        return f"Playback {self.achieved_fps:.1f}/{self.fps:.1f} FPS, {self.presented} presented, {self.dropped} dropped"
@@ -0,0 +1,80 @@
+import mediapipe as mp
+import logging
+
+from media_processor import clear_frame_cache
+from landmark_cache import open_landmark_cache
+from resolution_policy import ResolutionPolicy
+from face_budget import FaceBudget
+
+class Profile:
+    """A named set of FaceMesh, inference resolution and overlay settings that trade speed for accuracy."""
+    def __init__(self, name, refine_landmarks, max_num_faces, target_face_px, overlay, scales,
+                 min_detection_confidence=0.5, min_tracking_confidence=0.5):
+        self.name = name
+        self.refine_landmarks = refine_landmarks
+        self.max_num_faces = max_num_faces
+        self.min_detection_confidence = min_detection_confidence
+        self.min_tracking_confidence = min_tracking_confidence
+        self.target_face_px = target_face_px
+        self.overlay = overlay
+        self.scales = scales
+
+    def face_mesh_config(self, static_image_mode, max_num_faces=None):
+        """Return the FaceMesh keyword arguments for this profile, optionally with a tighter face limit."""
+        config = {
+            "static_image_mode": static_image_mode,
+            "max_num_faces": max_num_faces or self.max_num_faces,
+            "refine_landmarks": self.refine_landmarks,
+            "min_detection_confidence": self.min_detection_confidence,
+        }
+        if not static_image_mode:
+            config["min_tracking_confidence"] = self.min_tracking_confidence
+        return config
+
+    def create_face_mesh(self, static_image_mode, max_num_faces=None):
+        """Build a FaceMesh configured for this profile."""
+        return mp.solutions.face_mesh.FaceMesh(**self.face_mesh_config(static_image_mode, max_num_faces))
+
+    def video_policy(self):
+        """Return the inference resolution policy for video frames."""
+        return ResolutionPolicy(f"video/{self.name}", target_face_px=self.target_face_px)
+
+    def image_policy(self):
+        """Return the inference resolution policy for still images."""
+        return ResolutionPolicy(f"image/{self.name}", min_width=1024, min_height=768,
+                                target_face_px=self.target_face_px, expected_face_fraction=0.1)
+
+PROFILES = {
+    "fast": Profile("fast", refine_landmarks=False, max_num_faces=2, target_face_px=128,
+                    overlay="contours", scales=[1.0]),
+    "balanced": Profile("balanced", refine_landmarks=True, max_num_faces=5, target_face_px=192,
+                        overlay="full", scales=[0.75, 1.0, 1.25, 1.5]),
+    "accurate": Profile("accurate", refine_landmarks=True, max_num_faces=5, target_face_px=256,
+                        overlay="full", scales=[0.5, 0.75, 1.0, 1.25, 1.5, 2.0]),
+}
+DEFAULT_PROFILE = "balanced"
+
+def apply_profile(app, name):
+    """Rebuild the app's FaceMesh models and resolution policies for the named profile."""
+    profile = PROFILES[name]
+    for attr in ("face_mesh_image", "face_mesh_video"):
+        face_mesh = getattr(app, attr, None)
+        if face_mesh is not None:
+            face_mesh.close()
+
+    app.profile = profile
+    clear_frame_cache()
+    if getattr(app, 'static_detector', None) is not None:
+        app.static_detector.reset()
+    if getattr(app, 'face_budget', None) is not None:
+        app.face_budget.reset(profile)
+    else:
+        app.face_budget = FaceBudget(profile)
+    app.face_mesh_image = profile.create_face_mesh(static_image_mode=True)
+    app.face_mesh_video = profile.create_face_mesh(static_image_mode=False)
+    app.resolution_policy = profile.video_policy()
+    if getattr(app, 'landmark_cache', None) is not None:
+        open_landmark_cache(app, app.vid)
+    app.image_resolution_policy = profile.image_policy()
+    logging.info(f"Applied '{name}' profile: {profile.face_mesh_config(static_image_mode=False)}, "
+                 f"overlay {profile.overlay}, scales {profile.scales}")
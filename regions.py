@@ -0,0 +1,38 @@
+import mediapipe as mp
+
+_face_mesh = mp.solutions.face_mesh
+
+# Region groups selectable for extraction, drawing and export, built from the FaceMesh connection sets
+REGIONS = {
+    "lips": _face_mesh.FACEMESH_LIPS,
+    "eyes": _face_mesh.FACEMESH_LEFT_EYE | _face_mesh.FACEMESH_RIGHT_EYE,
+    "eyebrows": _face_mesh.FACEMESH_LEFT_EYEBROW | _face_mesh.FACEMESH_RIGHT_EYEBROW,
+    "face_oval": _face_mesh.FACEMESH_FACE_OVAL,
+}
+
+_index_cache = {}
+
+def parse_regions(value):
+    """Parse a comma-separated region list such as "lips,eyes"; an empty value selects all landmarks."""
+    names = [name.strip() for name in value.split(",") if name.strip()] if value else []
+    unknown = [name for name in names if name not in REGIONS]
+    if unknown:
+        raise ValueError(f"Unknown region(s) {', '.join(unknown)}; choose from {', '.join(REGIONS)}")
+    return names or None
+
+def region_connections(regions):
+    """Return (name, connections) pairs to draw; all regions when regions is None or empty."""
+    return [(name, REGIONS[name]) for name in (regions or REGIONS)]
+
+def region_indices(regions, landmark_count):
+    """Return the sorted landmark ids covered by regions, or every id when regions is None or empty."""
+    if not regions:
+        return range(landmark_count)
+    key = tuple(regions)
+    if key not in _index_cache:
+        indices = set()
+        for name in regions:
+            for start, end in REGIONS[name]:
+                indices.update((start, end))
+        _index_cache[key] = sorted(indices)
+    return _index_cache[key]
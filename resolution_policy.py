@@ -0,0 +1,67 @@
+import logging
+import math
+import cv2
+
+from collections import namedtuple
+
+ResolutionDecision = namedtuple("ResolutionDecision", ["source_width", "source_height", "width", "height", "scale", "reason"])
+
+class ResolutionPolicy:
+    """Choose the inference resolution for an input from its size, expected face size and a latency budget.
+
+    Small inputs are upscaled to at least min_width x min_height (capped at max_upscale). Inputs whose
+    expected faces are larger than target_face_px are downscaled, but never below the minimum size.
+    If latency_budget_ms is set, the working frame is further limited to the number of pixels that fit
+    the budget at pixels_per_ms.
+    """
+    def __init__(self, name, min_width=640, min_height=480, max_upscale=3.0, target_face_px=192,
+                 expected_face_fraction=0.25, latency_budget_ms=None, pixels_per_ms=50_000):
+        self.name = name
+        self.min_width = min_width
+        self.min_height = min_height
+        self.max_upscale = max_upscale
+        self.target_face_px = target_face_px
+        self.expected_face_fraction = expected_face_fraction
+        self.latency_budget_ms = latency_budget_ms
+        self.pixels_per_ms = pixels_per_ms
+        self._last_logged = None
+
+    def choose(self, width, height, label=None):
+        """Return the ResolutionDecision for a width x height input, logging it once per distinct input."""
+        expected_face_px = self.expected_face_fraction * min(width, height)
+        face_scale = min(1.0, self.target_face_px / expected_face_px)
+        floor_scale = max(self.min_width / width, self.min_height / height)
+        scale = min(max(face_scale, floor_scale), self.max_upscale)
+        reason = "upscale to minimum size" if scale > 1.0 else "downscale to target face size" if scale < 1.0 else "native"
+
+        if self.latency_budget_ms:
+            max_pixels = self.latency_budget_ms * self.pixels_per_ms
+            if width * height * scale * scale > max_pixels:
+                scale = math.sqrt(max_pixels / (width * height))
+                reason = f"downscale to {self.latency_budget_ms} ms latency budget"
+
+        if abs(scale - 1.0) < 0.05:
+            scale = 1.0
+            reason = "native"
+
+        target_width = max(1, int(round(width * scale)))
+        target_height = max(1, int(round(height * scale)))
+        decision = ResolutionDecision(width, height, target_width, target_height, scale, reason)
+
+        key = (width, height, label)
+        if key != self._last_logged:
+            self._last_logged = key
+            source = f" for {label}" if label else ""
+            logging.info(f"Resolution policy '{self.name}'{source}: {width}x{height} -> "
+                         f"{target_width}x{target_height} (scale {scale:.3f}, {reason})")
+        return decision
+
+    def resize(self, frame, decision):
+        """Resize frame to the decision's working size, using INTER_AREA to shrink and INTER_CUBIC to enlarge."""
+        if decision.scale == 1.0:
+            return frame
+        interpolation = cv2.INTER_AREA if decision.scale < 1.0 else cv2.INTER_CUBIC
+        return cv2.resize(frame, (decision.width, decision.height), interpolation=interpolation)
+
+VIDEO_POLICY = ResolutionPolicy("video")
+IMAGE_POLICY = ResolutionPolicy("image", min_width=1024, min_height=768, expected_face_fraction=0.1)
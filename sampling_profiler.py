@@ -0,0 +1,109 @@
+"""On-demand sampling profiler.
+
+While active, a background thread samples the Python stacks of every other thread at a fixed interval
+and counts them. The result is written to logs/ in collapsed-stack format, one "root;caller;callee count"
+line per distinct stack, which flamegraph.pl, speedscope and inferno read directly. When inactive
+nothing runs; the frame hook is a single attribute check.
+"""
+import threading
+import datetime
+import time
+import sys
+import os
+
+from collections import Counter
+from logger_setup import setup_logger
+
+logger = setup_logger(__name__)
+
+SAMPLE_INTERVAL = 0.005
+DEFAULT_FRAMES = 300
+MAX_SECONDS = 120
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+class SamplingProfiler:
+    """Samples all thread stacks for a bounded number of processed frames and writes collapsed stacks."""
+    def __init__(self, logs_dir="logs", interval=SAMPLE_INTERVAL):
+        self.logs_dir = logs_dir
+        self.interval = interval
+        self.active = False
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.samples = Counter()
+        self.frames_left = 0
+        self.last_output = None
+
+    def start(self, frames=DEFAULT_FRAMES, max_seconds=MAX_SECONDS):
+        """Start sampling until frames have been processed, max_seconds pass or stop is called."""
+        if self.active:
+            return
+        self.samples = Counter()
+        self.frames_left = frames
+        self.deadline = time.monotonic() + max_seconds
+        self.stop_event.clear()
+        self.active = True
+        self.thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self.thread.start()
+        logger.info(f"Sampling profiler started for {frames} frames")
+
+    def stop(self):
+        """Stop sampling and write the profile. Returns the output path, or None if nothing was sampled."""
+        if not self.active:
+            return None
+        self.active = False
+        self.stop_event.set()
+        if self.thread is not threading.current_thread():
+            self.thread.join()
+        return self._write()
+
+    def toggle(self, frames=DEFAULT_FRAMES):
+        """Start sampling, or stop early and return the output path of the profile written."""
+        if self.active:
+            return self.stop()
+        self.start(frames)
+        return None
+
+    def frame_done(self):
+        """Count one processed frame; stops the profiler once its frame window is used up."""
+        if not self.active:
+            return
+        self.frames_left -= 1
+        if self.frames_left <= 0:
+            self.stop()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self.stop_event.wait(self.interval):
+            if time.monotonic() > self.deadline:
+                self.active = False
+                break
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, f"thread-{thread_id}"))
+                self.samples[";".join(reversed(stack))] += 1
+        if not self.stop_event.is_set():
+            self._write()
+
+    def _write(self):
+        if not self.samples:
+            logger.info("Sampling profiler stopped without samples")
+            return None
+        os.makedirs(self.logs_dir, exist_ok=True)
+        path = os.path.join(self.logs_dir, f"profile_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.collapsed")
+        with open(path, 'w') as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        self.last_output = path
+        logger.info(f"Sampling profile with {sum(self.samples.values())} samples written to {path}")
+        return path
+
+profiler = SamplingProfiler()
@@ -1,14 +1,93 @@
+import threading
 import datetime
 import logging
+import atexit
+import queue
+import cv2
 import os
 
-from PIL import ImageGrab
 import tkinter as tk
 
+from media_processor import annotate_full_resolution
+
+class ScreenshotEncoder:
+    """Background worker that encodes and writes screenshot frames off the Tk thread."""
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def start(self):
+        """Start the encoder thread if it is not already running."""
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name="screenshot-encoder", daemon=True)
+                self.thread.start()
+
+    def submit(self, frame, filepath):
+        """Queue a BGR frame to be written as PNG to filepath."""
+        self.start()
+        self.queue.put((frame, filepath))
+
+    def shutdown(self):
+        """Write any pending screenshots and stop the encoder thread."""
+        if self.thread is not None and self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    return
+                frame, filepath = item
+                if cv2.imwrite(filepath, frame):
+                    logging.info(f"Screenshot saved to {filepath}")
+                else:
+                    logging.error(f"Failed to write screenshot to {filepath}")
+            except Exception as e:
+                logging.error(f"Error encoding screenshot: {e}")
+            finally:
+                self.queue.task_done()
+
+encoder = ScreenshotEncoder()
+atexit.register(encoder.shutdown)
+
+def _screenshot_frame(app, source_resolution):
+    """Return a copy of the last processed frame, at source or canvas resolution.
+
+    Previews are annotated at canvas size, so source resolution screenshots redraw the overlays on the
+    full-resolution source frame.
+    """
+    frame = getattr(app, 'last_frame', None)
+    if frame is None:
+        return None
+    if not source_resolution:
+        frame = cv2.resize(frame, (app.ui.canvas_width, app.ui.canvas_height), interpolation=cv2.INTER_AREA)
+    elif getattr(app, 'last_source_frame', None) is not None:
+        frame = annotate_full_resolution(app)
+    else:
+        frame = frame.copy()
+    return frame
+
+def capture_frame(app, source_resolution=None):
+    """Queue the last processed frame for encoding without throttling. Returns the target path or None."""
+    if source_resolution is None:
+        source_resolution = app.ui.screenshot_full_res_var.get()
+    frame = _screenshot_frame(app, source_resolution)
+    if frame is None:
+        return None
+
+    now = datetime.datetime.now()
+    filename = f"screenshot_{now.strftime('%Y%m%d_%H%M%S')}_{now.microsecond // 1000:03d}.png"
+    filepath = os.path.join(app.screenshots_dir, filename)
+    encoder.submit(frame, filepath)
+    return filepath
+
 def take_screenshot(app):
-    """Capture a screenshot of the app's canvas and save it to the screenshots directory."""
-    canvas_content = app.ui.canvas.find_all()
-    if not canvas_content:
+    """Capture the last processed frame and save it to the screenshots directory in the background."""
+    if getattr(app, 'last_frame', None) is None:
         logging.warning("Can't take screenshot when canvas is empty.")
         tk.messagebox.showwarning("Warning", "Can't take screenshot when canvas is empty.")
         return
@@ -19,17 +98,26 @@ def take_screenshot(app):
     app.last_screenshot_time = current_time
 
     try:
-        x = app.window.winfo_rootx() + app.ui.canvas.winfo_x()
-        y = app.window.winfo_rooty() + app.ui.canvas.winfo_y()
-        x1 = x + app.ui.canvas.winfo_width()
-        y1 = y + app.ui.canvas.winfo_height()
-
-        screenshot = ImageGrab.grab().crop((x, y, x1, y1))
-
-        now = datetime.datetime.now()
-        filename = f"screenshot_{now.strftime('%Y%m%d_%H%M%S')}.png"
-        filepath = os.path.join(app.screenshots_dir, filename)
-        screenshot.save(filepath)
-        logging.info(f"Screenshot saved to {filepath}")
+        capture_frame(app)
     except Exception as e:
         logging.error(f"Error taking screenshot: {e}")
+
+def take_burst(app, count=10, interval_ms=200):
+    """Capture count frames every interval_ms milliseconds without blocking playback."""
+    if getattr(app, 'last_frame', None) is None:
+        logging.warning("Can't take screenshot when canvas is empty.")
+        tk.messagebox.showwarning("Warning", "Can't take screenshot when canvas is empty.")
+        return
+
+    logging.info(f"Starting screenshot burst: {count} frames every {interval_ms} ms")
+
+    def capture(remaining):
+        try:
+            capture_frame(app)
+        except Exception as e:
+            logging.error(f"Error taking burst screenshot: {e}")
+            return
+        if remaining > 1:
+            app.window.after(interval_ms, capture, remaining - 1)
+
+    capture(count)
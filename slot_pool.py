@@ -0,0 +1,68 @@
+import multiprocessing
+import os
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from collections import deque
+
+_attached_slots = {}
+
+def attach_slot(name):
+    """Return the calling worker's handle on shared memory slot name, attaching on first use."""
+    shm = _attached_slots.get(name)
+    if shm is None:
+        shm = SharedMemory(name=name)
+        _attached_slots[name] = shm
+    return shm
+
+class SlotPool:
+    """Runs jobs in worker processes on data held in shared memory slots, completing them in submission order.
+
+    Subclasses fill a slot obtained from _acquire, start its job with _dispatch, and receive each result
+    in _deliver before the slot is reused. Workers look slots up by name with attach_slot.
+    """
+    def __init__(self, slot_size, initializer, initargs, workers=None, slots=None):
+        workers = workers or os.cpu_count() or 1
+        # Spawned rather than forked workers: forking after FaceMesh and OpenCV have started threads is unsafe
+        self.executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                            initializer=initializer, initargs=initargs)
+        slot_count = slots or 2 * workers
+        self.slots = [SharedMemory(create=True, size=slot_size) for _ in range(slot_count)]
+        self.free = deque(range(slot_count))
+        self.pending = deque()
+
+    def _acquire(self):
+        """Return a free slot index and its shared memory; blocks only when every slot is busy."""
+        while self.pending and self.pending[0][0].done():
+            self._complete_oldest()
+        if not self.free:
+            self._complete_oldest()
+        index = self.free.popleft()
+        return index, self.slots[index]
+
+    def _dispatch(self, index, fn, *args, context=None):
+        """Run fn(slot_name, *args) on a worker; context is handed to _deliver with the result."""
+        future = self.executor.submit(fn, self.slots[index].name, *args)
+        self.pending.append((future, index, context))
+
+    def _deliver(self, shm, result, context):
+        raise NotImplementedError
+
+    def _complete_oldest(self):
+        future, index, context = self.pending.popleft()
+        result = future.result()
+        try:
+            self._deliver(self.slots[index], result, context)
+        finally:
+            self.free.append(index)
+
+    def close(self):
+        """Deliver the remaining results, stop the workers and release the shared memory."""
+        try:
+            while self.pending:
+                self._complete_oldest()
+        finally:
+            self.executor.shutdown(cancel_futures=True)
+            for shm in self.slots:
+                shm.close()
+                shm.unlink()
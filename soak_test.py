@@ -0,0 +1,150 @@
+"""Headless soak test for the video path.
+
+Drives process_video_frame and the export path over a long video (a generated synthetic clip unless
+--video is given, looped as needed), samples RSS and tracemalloc after each export, prints the
+allocation sites that grew the most, and exits non-zero if memory grows faster than --max-growth-mb
+per thousand frames after warm-up.
+
+    python soak_test.py --frames 20000 --export-every 1000 --max-growth-mb 8
+"""
+import numpy as np
+import tracemalloc
+import argparse
+import datetime
+import tempfile
+import resource
+import gc
+import logging
+import shutil
+import sys
+import cv2
+import os
+
+from media_processor import process_video_frame
+from export_jobs import ExportJob, build_metadata
+from landmark_buffer import LandmarkBuffer
+from logger_setup import setup_logger
+from profiles import PROFILES, DEFAULT_PROFILE
+from headless import HeadlessApp
+
+logger = setup_logger(__name__)
+
+def rss_mb():
+    """Return the current resident set size in MB (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def generate_video(path, frames=300, width=640, height=480, fps=30):
+    """Write a synthetic clip of moving shapes and noise to path."""
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    rng = np.random.default_rng(0)
+    for i in range(frames):
+        frame = rng.integers(0, 40, (height, width, 3), dtype=np.uint8)
+        cx = int(width / 2 + width / 3 * np.sin(i / 20))
+        cy = int(height / 2 + height / 4 * np.cos(i / 30))
+        cv2.ellipse(frame, (cx, cy), (70, 90), 0, 0, 360, (140, 170, 210), -1)
+        cv2.circle(frame, (cx - 25, cy - 20), 8, (40, 40, 40), -1)
+        cv2.circle(frame, (cx + 25, cy - 20), 8, (40, 40, 40), -1)
+        cv2.ellipse(frame, (cx, cy + 35), (25, 8), 0, 0, 180, (60, 60, 150), 3)
+        writer.write(frame)
+    writer.release()
+    return path
+
+def read_frame(app, video_path):
+    """Read the next frame, rewinding to the start when the clip ends."""
+    ret, frame = app.vid.read()
+    if not ret:
+        app.vid.release()
+        app.vid = cv2.VideoCapture(video_path)
+        ret, frame = app.vid.read()
+    return frame if ret else None
+
+def run(args):
+    work_dir = tempfile.mkdtemp(prefix="soak_")
+    app = HeadlessApp(landmarks_dir=os.path.join(work_dir, "landmarks"), profile=args.profile)
+    try:
+        video_path = args.video or generate_video(os.path.join(work_dir, "synthetic.mp4"))
+        app.video_path = video_path
+        app.vid = cv2.VideoCapture(video_path)
+        if not app.vid.isOpened():
+            logger.error(f"Failed to open video file {video_path}")
+            return 2
+        app.all_landmarks = LandmarkBuffer(os.path.join(app.landmarks_dir, ".spill"))
+
+        tracemalloc.start(args.traceback_depth)
+        baseline_snapshot = None
+        samples = []
+
+        for i in range(1, args.frames + 1):
+            frame = read_frame(app, video_path)
+            if frame is None:
+                logger.error("Video produced no frames")
+                return 2
+            _, landmarks = process_video_frame(app, frame)
+            app.all_landmarks.extend(landmarks)
+            app.frame_count += 1
+
+            if i % args.export_every == 0:
+                frames = app.all_landmarks
+                app.all_landmarks = LandmarkBuffer(os.path.join(app.landmarks_dir, ".spill"))
+                filepath = os.path.join(app.landmarks_dir, f"soak_{i:08d}.json")
+                ExportJob(filepath, build_metadata(app, datetime.datetime.now()), frames).run()
+                os.remove(filepath)
+
+            # Sampling right after an export keeps the capture buffer's fill level out of the measurement
+            if i >= args.warmup and i % args.export_every == 0:
+                gc.collect()
+                if baseline_snapshot is None:
+                    baseline_snapshot = tracemalloc.take_snapshot()
+                traced, _ = tracemalloc.get_traced_memory()
+                samples.append((i, rss_mb(), traced / (1024 * 1024)))
+                logger.info(f"Frame {i}: RSS {samples[-1][1]:.1f} MB, traced {samples[-1][2]:.1f} MB")
+
+        if len(samples) < 2:
+            logger.error("Need at least two samples after warm-up; increase --frames or lower --export-every")
+            return 2
+
+        final_snapshot = tracemalloc.take_snapshot()
+        final_rss = rss_mb()
+        tracemalloc.stop()
+
+        logger.info(f"Top {args.top} allocation sites by growth since warm-up:")
+        for stat in final_snapshot.compare_to(baseline_snapshot, "traceback")[:args.top]:
+            logger.info(f"  {stat.size_diff / 1024:+.1f} KiB in {stat.count_diff:+d} blocks")
+            for line in stat.traceback.format():
+                logger.info(f"    {line}")
+
+        sample_frames = np.array([sample[0] for sample in samples], dtype=np.float64)
+        sample_rss = np.array([sample[1] for sample in samples], dtype=np.float64)
+        growth = np.polyfit(sample_frames, sample_rss, 1)[0] * 1000
+        logger.info(f"RSS {sample_rss[0]:.1f} MB -> {sample_rss[-1]:.1f} MB over {int(sample_frames[-1] - sample_frames[0])} frames: "
+                    f"{growth:.2f} MB per 1000 frames (limit {args.max_growth_mb} MB), {final_rss:.1f} MB at the end of the run")
+        if growth > args.max_growth_mb:
+            logger.error("Memory growth exceeds the configured bound")
+            return 1
+        return 0
+    finally:
+        app.close()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Soak test the video path for memory growth.")
+    parser.add_argument("--video", help="video file to loop instead of a generated synthetic clip")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default=DEFAULT_PROFILE, help="performance profile")
+    parser.add_argument("--frames", type=int, default=10000, help="number of frames to process")
+    parser.add_argument("--warmup", type=int, default=1000, help="frames processed before the first sample")
+    parser.add_argument("--export-every", type=int, default=1000, help="frames between exports; memory is sampled after each")
+    parser.add_argument("--max-growth-mb", type=float, default=10.0, help="allowed RSS growth per 1000 frames")
+    parser.add_argument("--top", type=int, default=10, help="number of allocation sites to report")
+    parser.add_argument("--traceback-depth", type=int, default=5, help="frames kept per tracemalloc traceback")
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.INFO)
+    sys.exit(run(args))
+
+if __name__ == "__main__":
+    main()
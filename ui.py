@@ -1,8 +1,11 @@
 from tkinter import ttk
 import tkinter as tk
 
-from screenshot import take_screenshot
+from screenshot import take_screenshot, take_burst
+from sampling_profiler import profiler
 from logger_setup import setup_logger
+from profiles import PROFILES
+from regions import REGIONS
 
 logger = setup_logger(__name__)
 
@@ -22,6 +25,7 @@ class UI:
 
         self.canvas.bind('<Left>', lambda e: self.prev_frame()) 
         self.canvas.bind('<Right>', lambda e: self.next_frame())
+        window.bind('<Control-p>', lambda e: profiler.toggle())
         self.canvas.focus_set()
 
         separator = tk.Frame(window, height=2, bd=1, relief=tk.SUNKEN)
@@ -60,8 +64,14 @@ class UI:
 
         self.btn_screenshot = tk.Button(frame_control_frame, text="Screenshot", width=15, 
                                         relief="groove", bd=2, command=lambda: take_screenshot(self.app))
+        self.create_tooltip(self.btn_screenshot, "Save the current frame (Ctrl+S)")
         self.btn_screenshot.pack(side=tk.LEFT, padx=5)
 
+        self.btn_burst = tk.Button(frame_control_frame, text="Burst", width=8, 
+                                   relief="groove", bd=2, command=lambda: take_burst(self.app))
+        self.create_tooltip(self.btn_burst, "Save 10 frames at 200 ms intervals (Ctrl+Shift+S)")
+        self.btn_burst.pack(side=tk.LEFT, padx=5)
+
         self.btn_next_frame = tk.Button(frame_control_frame, text="→", width=4, 
                                         relief="groove", bd=2, command=self.next_frame, state=tk.DISABLED)
         self.create_tooltip(self.btn_next_frame, "Next frame (Right Arrow)")
@@ -97,8 +107,85 @@ class UI:
         )
         self.hand_detection_cb.grid(row=0, column=2, padx=10, pady=10, sticky="w")
 
+        self.screenshot_full_res_var = tk.BooleanVar(value=False)
+        self.screenshot_full_res_cb = tk.Checkbutton(
+            options_frame, 
+            text="Full-resolution screenshots",
+            variable=self.screenshot_full_res_var
+        )
+        self.screenshot_full_res_cb.grid(row=1, column=0, padx=10, pady=(0, 10), sticky="w")
+
+        self.compress_export_var = tk.BooleanVar(value=False)
+        self.compress_export_cb = tk.Checkbutton(
+            options_frame, 
+            text="Compress exports (gzip)",
+            variable=self.compress_export_var
+        )
+        self.compress_export_cb.grid(row=1, column=1, padx=10, pady=(0, 10), sticky="w")
+
+        self.playback_label = tk.Label(options_frame, text="", anchor="w")
+        self.playback_label.grid(row=1, column=2, padx=10, pady=(0, 10), sticky="w")
+
+        profile_frame = tk.Frame(options_frame)
+        profile_frame.grid(row=2, column=0, columnspan=3, padx=10, pady=(0, 10), sticky="w")
+        tk.Label(profile_frame, text="Performance profile:").pack(side=tk.LEFT)
+        self.profile_var = tk.StringVar(value=self.app.profile.name)
+        self.profile_combo = ttk.Combobox(profile_frame, textvariable=self.profile_var, state="readonly",
+                                          values=list(PROFILES), width=12)
+        self.profile_combo.pack(side=tk.LEFT, padx=5)
+        self.profile_combo.bind("<<ComboboxSelected>>", lambda e: self.app.select_profile(self.profile_var.get()))
+        self.create_tooltip(self.profile_combo, "fast: contours only, 2 faces; balanced: full mesh, 5 faces; accurate: larger inference size and more scales")
+
+        regions_frame = tk.Frame(options_frame)
+        regions_frame.grid(row=3, column=0, columnspan=3, padx=10, pady=(0, 10), sticky="w")
+        tk.Label(regions_frame, text="Regions (none = all landmarks):").pack(side=tk.LEFT)
+        self.region_vars = {}
+        for name in REGIONS:
+            var = tk.BooleanVar(value=bool(self.app.regions and name in self.app.regions))
+            tk.Checkbutton(regions_frame, text=name.replace("_", " ").capitalize(), variable=var,
+                           command=self.update_regions).pack(side=tk.LEFT)
+            self.region_vars[name] = var
+
+        self.build_index_var = tk.BooleanVar(value=False)
+        self.build_index_cb = tk.Checkbutton(
+            options_frame, 
+            text="Build query index with exports",
+            variable=self.build_index_var
+        )
+        self.build_index_cb.grid(row=4, column=0, padx=10, pady=(0, 10), sticky="w")
+
+        self.stream_export_var = tk.BooleanVar(value=False)
+        self.stream_export_cb = tk.Checkbutton(
+            options_frame, 
+            text="Delta-encoded stream (.lmks)",
+            variable=self.stream_export_var
+        )
+        self.stream_export_cb.grid(row=4, column=1, padx=10, pady=(0, 10), sticky="w")
+
+        self.static_skip_var = tk.BooleanVar(value=self.app.static_detector.enabled)
+        self.static_skip_cb = tk.Checkbutton(
+            options_frame, 
+            text="Skip static frames",
+            variable=self.static_skip_var,
+            command=lambda: self.app.set_static_skipping(self.static_skip_var.get())
+        )
+        self.static_skip_cb.grid(row=4, column=2, padx=10, pady=(0, 10), sticky="w")
+        self.create_tooltip(self.static_skip_cb, "Reuse the last landmarks for frames that look unchanged; turn off to track small motion on a static camera")
+        self.create_tooltip(self.stream_export_cb, "Keyframes plus int16 deltas; positions within 1/128 px of the JSON export")
+
+        self.export_frame = tk.Frame(window)
+        self.export_frame.grid(row=4, column=0, columnspan=4, padx=10, pady=(0, 10), sticky="ew")
+        self.export_label = tk.Label(self.export_frame, text="", anchor="w")
+        self.export_label.pack(side=tk.LEFT, padx=5)
+        self.export_progress = ttk.Progressbar(self.export_frame, mode="determinate", maximum=100)
+        self.export_progress.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        self.btn_cancel_export = tk.Button(self.export_frame, text="Cancel", width=8, 
+                                           relief="groove", bd=2, command=self.app.cancel_exports)
+        self.btn_cancel_export.pack(side=tk.LEFT, padx=5)
+        self.export_frame.grid_remove()
+
         window.grid_columnconfigure(0, weight=1)
-        for i in range(4):
+        for i in range(5):
             window.grid_rowconfigure(i, weight=1 if i == 0 else 0)
 
     def prev_frame(self):
@@ -113,6 +200,23 @@ class UI:
             self.app.toggle_play_pause()
         self.app.next_frame()
 
+    def update_regions(self):
+        """Apply the checked landmark regions."""
+        self.app.select_regions([name for name, var in self.region_vars.items() if var.get()])
+
+    def show_export_progress(self, fraction, text=""):
+        """Show export progress as a fraction between 0 and 1, or hide the progress bar when fraction is None."""
+        if fraction is None:
+            self.export_frame.grid_remove()
+            return
+        self.export_label.config(text=text)
+        self.export_progress['value'] = fraction * 100
+        self.export_frame.grid()
+
+    def display_size(self):
+        """Return the (width, height) video frames are previewed at."""
+        return (self.canvas_width, self.canvas_height)
+
     def enable_frame_controls(self, enable=True):
         """Enable or disable frame navigation controls"""
         state = tk.NORMAL if enable else tk.DISABLED